@@ -22,11 +22,9 @@ class IngredientAdmin(admin.ModelAdmin):
 
 @admin.register(Recipe)
 class RecipeAdmin(admin.ModelAdmin):
-    list_display = ('name', 'author', 'count_favorites')
+    list_display = ('name', 'author', 'favorites_count', 'cart_count')
     list_filter = ('author', 'name', 'tags')
-
-    def count_favorites(self, obj):
-        return obj.favorites.count()
+    list_select_related = ('author',)
 
 
 @admin.register(Cart)
@@ -1,5 +1,14 @@
+import os
+
 from django.apps import AppConfig
+from django.conf import settings
 
 
 class ApiConfig(AppConfig):
     name = 'api'
+
+    def ready(self):
+        import api.signals  # noqa: F401
+        from api.shopping_list import FONT_FILE, load_template
+
+        load_template(os.path.join(settings.BASE_DIR, FONT_FILE))
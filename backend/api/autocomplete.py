@@ -0,0 +1,89 @@
+from django.conf import settings
+from django.db.models import Case, IntegerField, Value, When
+
+from api.models import Ingredient
+from api.reference import get_reference
+
+_trie = None
+
+
+class IngredientTrie:
+    def __init__(self, version, ingredients):
+        self.version = version
+        self.ingredients = sorted(ingredients, key=lambda item: item[1])
+        self.root = {}
+        for index, (_, name, _) in enumerate(self.ingredients):
+            node = self.root
+            for char in name.lower():
+                node = node.setdefault(char, {})
+            node.setdefault(None, []).append(index)
+
+    def find_node(self, prefix):
+        node = self.root
+        for char in prefix:
+            node = node.get(char)
+            if node is None:
+                return None
+        return node
+
+    def iter_prefixed(self, node):
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            yield from node.get(None, ())
+            stack.extend(node[char] for char in sorted(
+                (char for char in node if char is not None), reverse=True))
+
+    def search(self, query, limit):
+        query = query.lower()
+        found = []
+        node = self.find_node(query)
+        if node is not None:
+            for index in self.iter_prefixed(node):
+                found.append(index)
+                if len(found) == limit:
+                    break
+        if len(found) < limit:
+            prefixed = set(found)
+            for index, (_, name, _) in enumerate(self.ingredients):
+                if index not in prefixed and query in name.lower():
+                    found.append(index)
+                    if len(found) == limit:
+                        break
+        return [self.ingredients[index] for index in found]
+
+
+def get_trie():
+    global _trie
+    reference = get_reference()
+    if _trie is None or _trie.version != reference.version:
+        _trie = IngredientTrie(reference.version, (
+            (pk, name, measurement_unit)
+            for pk, (name, measurement_unit)
+            in reference.ingredients.items()
+        ))
+    return _trie
+
+
+def search_database(query, limit):
+    return Ingredient.objects.filter(name__icontains=query).annotate(
+        rank=Case(
+            When(name__istartswith=query, then=Value(0)),
+            default=Value(1),
+            output_field=IntegerField(),
+        )
+    ).order_by('rank', 'name')[:limit]
+
+
+def search_trie(query, limit):
+    return [
+        {'id': pk, 'name': name, 'measurement_unit': measurement_unit}
+        for pk, name, measurement_unit in get_trie().search(query, limit)
+    ]
+
+
+def search_ingredients(query, limit):
+    limit = min(limit, settings.INGREDIENT_AUTOCOMPLETE_MAX_LIMIT)
+    if settings.INGREDIENT_AUTOCOMPLETE_BACKEND == 'trie':
+        return search_trie(query, limit)
+    return search_database(query, limit)
@@ -0,0 +1,85 @@
+import math
+import shutil
+import tempfile
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext, override_settings
+from rest_framework.test import APIClient
+
+
+def percentile(values, percent):
+    ordered = sorted(values)
+    index = max(math.ceil(len(ordered) * percent / 100) - 1, 0)
+    return ordered[index]
+
+
+def summary(timings):
+    return {
+        'p50': percentile(timings, 50),
+        'p95': percentile(timings, 95),
+        'p99': percentile(timings, 99),
+    }
+
+
+@contextmanager
+def temporary_media_root():
+    directory = tempfile.mkdtemp(prefix='foodgram-media-')
+    try:
+        with override_settings(MEDIA_ROOT=directory):
+            yield directory
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def get_client(user=None):
+    client = APIClient()
+    if user is not None:
+        client.force_authenticate(user=user)
+    return client
+
+
+def read_response(response):
+    if response.streaming:
+        return b''.join(response.streaming_content)
+    return response.content
+
+
+def measure(request, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        read_response(request())
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+
+def profile(request, repeat, warmup=0):
+    for _ in range(warmup):
+        read_response(request())
+    timings, queries, statuses = [], [], Counter()
+    started = time.perf_counter()
+    for _ in range(repeat):
+        with CaptureQueriesContext(connection) as captured:
+            request_started = time.perf_counter()
+            response = request()
+            read_response(response)
+            timings.append((time.perf_counter() - request_started) * 1000)
+        queries.append(len(captured))
+        statuses[response.status_code] += 1
+    elapsed = time.perf_counter() - started
+    return {
+        'requests': repeat,
+        'queries': {
+            'mean': sum(queries) / len(queries),
+            'max': max(queries),
+        },
+        'latency_ms': {
+            **summary(timings),
+            'mean': sum(timings) / len(timings),
+        },
+        'throughput_rps': repeat / elapsed,
+        'statuses': dict(statuses),
+    }
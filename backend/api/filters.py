@@ -1,31 +1,52 @@
+from django.db.models import Exists, OuterRef
 from django_filters.rest_framework import FilterSet, filters
-from rest_framework.filters import SearchFilter
 
-from api.models import Recipe
+from api.models import Cart, Favorite, Recipe
+from api.reference import get_reference
 from users.models import User
 
+ORDERING_CHOICES = (
+    ('popular', 'По популярности'),
+)
 
-class IngredientSearchFilter(SearchFilter):
-    search_param = 'name'
+
+def get_tag_choices():
+    return [(slug, slug) for slug in get_reference().tag_slugs]
 
 
 class AuthorAndTagFilter(FilterSet):
-    tags = filters.AllValuesMultipleFilter(field_name='tags__slug')
+    tags = filters.MultipleChoiceFilter(choices=get_tag_choices,
+                                        method='filter_tags')
     author = filters.ModelChoiceFilter(queryset=User.objects.all())
     is_favorited = filters.BooleanFilter(method='filter_is_favorited')
     is_in_shopping_cart = filters.BooleanFilter(
         method='filter_is_in_shopping_cart')
+    ordering = filters.ChoiceFilter(choices=ORDERING_CHOICES,
+                                    method='filter_ordering')
+
+    def filter_tags(self, queryset, name, value):
+        tag_slugs = get_reference().tag_slugs
+        return queryset.filter(Exists(Recipe.tags.through.objects.filter(
+            recipe_id=OuterRef('pk'),
+            tag_id__in=[tag_slugs[slug] for slug in value],
+        )))
 
     def filter_is_favorited(self, queryset, name, value):
         if value and not self.request.user.is_anonymous:
-            return queryset.filter(favorites__user=self.request.user)
+            return queryset.filter(Exists(Favorite.objects.filter(
+                user_id=self.request.user.pk, recipe_id=OuterRef('pk'))))
         return queryset
 
     def filter_is_in_shopping_cart(self, queryset, name, value):
         if value and not self.request.user.is_anonymous:
-            return queryset.filter(cart__user=self.request.user)
+            return queryset.filter(Exists(Cart.objects.filter(
+                user_id=self.request.user.pk, recipe_id=OuterRef('pk'))))
         return queryset
 
+    def filter_ordering(self, queryset, name, value):
+        return queryset.order_by('-favorites_count', '-id')
+
     class Meta:
         model = Recipe
-        fields = ('tags', 'author', 'is_favorited', 'is_in_shopping_cart')
+        fields = ('tags', 'author', 'is_favorited', 'is_in_shopping_cart',
+                  'ordering')
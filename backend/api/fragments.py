@@ -0,0 +1,50 @@
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import prefetch_related_objects
+
+from api.reference import get_version
+
+FRAGMENT_KEY = 'recipe_fragment:{}:{}:{}'
+FRAGMENT_VERSION_KEY = 'recipe_fragment_version:{}'
+FRAGMENT_RELATED = ('author', 'tags', 'ingredientamount_set')
+
+
+def get_recipe_versions(recipe_ids):
+    keys = [FRAGMENT_VERSION_KEY.format(recipe_id) for recipe_id in recipe_ids]
+    versions = cache.get_many(keys)
+    missing = [key for key in keys if key not in versions]
+    for key in missing:
+        version = uuid.uuid4().hex
+        if not cache.add(key, version, settings.RECIPE_FRAGMENT_TIMEOUT):
+            version = cache.get(key, version)
+        versions[key] = version
+    return [versions[key] for key in keys]
+
+
+def get_fragments(recipes, build):
+    if not settings.CACHE_SHARED:
+        prefetch_related_objects(recipes, *FRAGMENT_RELATED)
+        return [build(recipe) for recipe in recipes]
+    version = get_version()
+    keys = [FRAGMENT_KEY.format(version, recipe.id, recipe_version)
+            for recipe, recipe_version in zip(recipes, get_recipe_versions(
+                [recipe.id for recipe in recipes]))]
+    fragments = cache.get_many(keys)
+    missing = [(key, recipe) for key, recipe in zip(keys, recipes)
+               if key not in fragments]
+    if missing:
+        prefetch_related_objects([recipe for _, recipe in missing],
+                                 *FRAGMENT_RELATED)
+        built = {key: build(recipe) for key, recipe in missing}
+        cache.set_many(built, settings.RECIPE_FRAGMENT_TIMEOUT)
+        fragments.update(built)
+    return [fragments[key] for key in keys]
+
+
+def invalidate_fragments(recipe_ids):
+    cache.set_many({
+        FRAGMENT_VERSION_KEY.format(recipe_id): uuid.uuid4().hex
+        for recipe_id in recipe_ids
+    }, settings.RECIPE_FRAGMENT_TIMEOUT)
@@ -0,0 +1,218 @@
+import base64
+import binascii
+import hashlib
+import io
+import logging
+import mimetypes
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from tempfile import SpooledTemporaryFile
+
+from django.conf import settings
+from django.core.files.base import ContentFile, File
+from django.core.files.storage import default_storage
+from django.db import connections
+from PIL import Image, ImageOps, features
+
+from api.fragments import invalidate_fragments
+from api.models import Recipe
+from api.response_cache import invalidate_responses
+from api.storage import recipe_image_storage
+
+logger = logging.getLogger(__name__)
+
+IMAGE_DIR = 'recipes'
+VARIANT_DIR = 'recipes/variants'
+VARIANTS = {
+    'thumb': (160, 160),
+    'card': (480, 480),
+    'full': (1280, 1280),
+}
+VARIANT_QUALITY = 80
+BASE64_HEADER = ';base64,'
+BASE64_CHUNK_SIZE = 64 * 1024
+IMAGE_HEADER_MAX_BYTES = 256 * 1024
+UPLOAD_FORMATS = {
+    'JPEG': 'jpg',
+    'PNG': 'png',
+    'GIF': 'gif',
+    'WEBP': 'webp',
+}
+
+_executor = None
+
+
+def decode_image(data):
+    if ';base64,' in data:
+        data = data.split(';base64,', 1)[1]
+    raw = base64.b64decode(data)
+    with Image.open(io.BytesIO(raw)) as image:
+        extension = image.format.lower()
+        image.verify()
+    return raw, 'jpg' if extension == 'jpeg' else extension
+
+
+class ImageRejected(ValueError):
+    pass
+
+
+def size_rejected():
+    return ImageRejected('Сторона картинки не должна превышать '
+                         f'{settings.IMAGE_MAX_SIDE} пикселей')
+
+
+def check_image(image):
+    if max(image.size) > settings.IMAGE_MAX_SIDE:
+        raise size_rejected()
+    if image.format not in UPLOAD_FORMATS:
+        raise ImageRejected('Неподдерживаемый формат картинки')
+    image.verify()
+    return UPLOAD_FORMATS[image.format]
+
+
+def check_image_header(file):
+    position = file.tell()
+    file.seek(0)
+    try:
+        with Image.open(file) as image:
+            if max(image.size) > settings.IMAGE_MAX_SIDE:
+                raise size_rejected()
+    except Image.DecompressionBombError:
+        raise size_rejected()
+    except OSError:
+        return False
+    finally:
+        file.seek(position)
+    return True
+
+
+def iter_base64_chunks(data, start):
+    pending = ''
+    for offset in range(start, len(data), BASE64_CHUNK_SIZE):
+        pending += ''.join(data[offset:offset + BASE64_CHUNK_SIZE].split())
+        aligned = len(pending) // 4 * 4
+        if aligned:
+            yield pending[:aligned]
+            pending = pending[aligned:]
+    if pending:
+        yield pending
+
+
+def read_base64_image(data):
+    start = data.find(BASE64_HEADER)
+    start = 0 if start == -1 else start + len(BASE64_HEADER)
+    file = SpooledTemporaryFile(max_size=settings.IMAGE_SPOOL_SIZE)
+    header_checked = False
+    try:
+        for chunk in iter_base64_chunks(data, start):
+            if file.tell() + len(chunk) // 4 * 3 > settings.IMAGE_MAX_BYTES:
+                raise ImageRejected(
+                    'Размер картинки не должен превышать '
+                    f'{settings.IMAGE_MAX_BYTES // 1024 ** 2} МБ')
+            file.write(binascii.a2b_base64(chunk))
+            if not header_checked and file.tell() <= IMAGE_HEADER_MAX_BYTES:
+                header_checked = check_image_header(file)
+        file.seek(0)
+        try:
+            image = Image.open(file)
+        except Image.DecompressionBombError:
+            raise size_rejected()
+        with image:
+            extension = check_image(image)
+        file.seek(0)
+    except BaseException:
+        file.close()
+        raise
+    return File(file, name=f'{uuid.uuid4().hex}.{extension}')
+
+
+def save_image(data):
+    if not data:
+        return None
+    try:
+        raw, extension = decode_image(data)
+    except (binascii.Error, ValueError, OSError):
+        return None
+    return recipe_image_storage.save(f'{IMAGE_DIR}/image.{extension}',
+                                     ContentFile(raw))
+
+
+def encode_image(name):
+    if not name:
+        return None
+    try:
+        with default_storage.open(name) as image:
+            raw = image.read()
+    except OSError:
+        return None
+    mime_type = mimetypes.guess_type(name)[0] or 'image/jpeg'
+    return f'data:{mime_type};base64,{base64.b64encode(raw).decode()}'
+
+
+def get_variant_format():
+    if features.check('webp'):
+        return 'WEBP', 'webp'
+    return 'JPEG', 'jpg'
+
+
+def get_variant_name(basename, variant):
+    return f'{VARIANT_DIR}/{variant}/{basename}'
+
+
+def get_image_name(recipe, variant):
+    if recipe.image_variant:
+        return get_variant_name(recipe.image_variant, variant)
+    return recipe.image.name
+
+
+def render_variant(image, size, image_format):
+    variant = image.copy()
+    variant.thumbnail(size, Image.LANCZOS)
+    buffer = io.BytesIO()
+    variant.save(buffer, image_format, quality=VARIANT_QUALITY)
+    return buffer.getvalue()
+
+
+def create_variants(name):
+    with default_storage.open(name) as file:
+        raw = file.read()
+    image_format, extension = get_variant_format()
+    basename = f'{hashlib.sha256(raw).hexdigest()}.{extension}'
+    with Image.open(io.BytesIO(raw)) as original:
+        image = ImageOps.exif_transpose(original)
+        if image_format == 'JPEG' or image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGB')
+        for variant, size in VARIANTS.items():
+            variant_name = get_variant_name(basename, variant)
+            if not default_storage.exists(variant_name):
+                default_storage.save(variant_name, ContentFile(
+                    render_variant(image, size, image_format)))
+    return basename
+
+
+def process_recipe_image(recipe_id, name):
+    try:
+        basename = create_variants(name)
+        if Recipe.objects.filter(pk=recipe_id, image=name).update(
+                image_variant=basename):
+            invalidate_fragments([recipe_id])
+            invalidate_responses('recipes')
+        return basename
+    except OSError:
+        logger.exception('Не удалось обработать изображение %s', name)
+        return None
+    finally:
+        connections.close_all()
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.IMAGE_WORKERS,
+            thread_name_prefix='recipe-images')
+    return _executor
+
+
+def schedule_recipe_image(recipe_id, name):
+    return get_executor().submit(process_recipe_image, recipe_id, name)
@@ -0,0 +1,202 @@
+import base64
+import io
+import json
+import random
+from datetime import datetime, timezone
+from itertools import cycle
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Count
+from PIL import Image
+
+from api.benchmarks import get_client, profile, temporary_media_root
+from api.models import Cart, Favorite, Ingredient, Recipe, Tag
+from api.reference import invalidate_reference
+from api.response_cache import invalidate_responses
+from api.user_state import invalidate_user_state
+from users.models import Follow, User
+
+READ_SCENARIOS = (
+    'recipes_anonymous',
+    'recipes',
+    'recipes_filtered',
+    'recipe_detail',
+    'subscriptions',
+    'ingredient_search',
+    'ingredient_autocomplete',
+    'shopping_cart',
+)
+WRITE_SCENARIOS = ('recipe_create', 'recipe_update')
+SCENARIOS = READ_SCENARIOS + WRITE_SCENARIOS
+SEARCH_QUERIES = ('мол', 'сах', 'кар', 'яйц', 'мук', 'сол', 'лук', 'мас')
+
+
+def make_image():
+    buffer = io.BytesIO()
+    Image.new('RGB', (320, 240), '#49B64E').save(buffer, 'JPEG')
+    return ('data:image/jpeg;base64,'
+            + base64.b64encode(buffer.getvalue()).decode())
+
+
+class Command(BaseCommand):
+    help = 'measuring latency, throughput and queries of the main endpoints'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scenarios', nargs='+', choices=SCENARIOS,
+                            default=list(SCENARIOS))
+        parser.add_argument('--repeat', type=int, default=50)
+        parser.add_argument('--warmup', type=int, default=5)
+        parser.add_argument('--prefix', default='bench')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--output', help='файл для сохранения отчёта')
+
+    def handle(self, *args, **options):
+        random.seed(options['seed'])
+        self.user = User.objects.filter(
+            username__startswith=f'{options["prefix"]}_'
+        ).annotate(
+            recipes_count=Count('recipes')
+        ).order_by('-recipes_count', 'id').first()
+        if self.user is None or not Recipe.objects.exists():
+            raise CommandError('Нет данных для замера, '
+                               'выполните generate_dataset')
+        self.recipe_ids = list(Recipe.objects.order_by('-id').values_list(
+            'id', flat=True)[:500])
+        self.ingredient_ids = list(Ingredient.objects.values_list(
+            'id', flat=True)[:500])
+        self.tags = list(Tag.objects.values_list('id', 'slug'))
+        self.image = make_image()
+        results = {}
+        try:
+            with temporary_media_root():
+                self.run_scenarios(options, results)
+        finally:
+            if set(options['scenarios']) & set(WRITE_SCENARIOS):
+                invalidate_reference()
+                invalidate_responses('recipes')
+                invalidate_user_state(self.user.pk)
+        report = json.dumps({
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'database': connection.vendor,
+            'cache': settings.CACHES['default']['BACKEND'],
+            'options': {key: options[key]
+                        for key in ('repeat', 'warmup', 'seed')},
+            'dataset': self.get_dataset(),
+            'scenarios': results,
+        }, ensure_ascii=False, indent=2)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as f:
+                f.write(report)
+        else:
+            self.stdout.write(report)
+
+    def run_scenarios(self, options, results):
+        for name in options['scenarios']:
+            with transaction.atomic():
+                request = getattr(self, f'scenario_{name}')()
+                results[name] = profile(request, options['repeat'],
+                                        options['warmup'])
+                transaction.set_rollback(True)
+            self.stderr.write(self.format_result(name, results[name]))
+
+    def get_dataset(self):
+        return {
+            'users': User.objects.count(),
+            'recipes': Recipe.objects.count(),
+            'ingredients': Ingredient.objects.count(),
+            'favorites': Favorite.objects.count(),
+            'cart': Cart.objects.count(),
+            'follows': Follow.objects.count(),
+        }
+
+    def format_result(self, name, result):
+        latency = result['latency_ms']
+        return (f'{name:<24} p50 {latency["p50"]:8.2f} ms  '
+                f'p95 {latency["p95"]:8.2f} ms  '
+                f'p99 {latency["p99"]:8.2f} ms  '
+                f'{result["throughput_rps"]:8.1f} req/s  '
+                f'queries {result["queries"]["mean"]:.1f}')
+
+    def get_payload(self, name):
+        return {
+            'name': name,
+            'text': 'Рецепт для замера',
+            'cooking_time': random.randint(5, 180),
+            'tags': [tag_id for tag_id, _ in random.sample(
+                self.tags, min(2, len(self.tags)))],
+            'ingredients': [
+                {'id': ingredient_id, 'amount': random.randint(1, 500)}
+                for ingredient_id in random.sample(
+                    self.ingredient_ids, min(5, len(self.ingredient_ids)))
+            ],
+        }
+
+    def scenario_recipes_anonymous(self):
+        client = get_client()
+        return lambda: client.get('/api/recipes/?page=1&limit=6')
+
+    def scenario_recipes(self):
+        client = get_client(self.user)
+        pages = cycle(range(1, 6))
+        return lambda: client.get(f'/api/recipes/?page={next(pages)}&limit=6')
+
+    def scenario_recipes_filtered(self):
+        client = get_client(self.user)
+        slugs = cycle(slug for _, slug in self.tags)
+        authors = cycle(list(Follow.objects.filter(
+            user=self.user).values_list('author_id', flat=True)[:10])
+            or [self.user.pk])
+        queries = cycle((
+            lambda: f'tags={next(slugs)}&tags={next(slugs)}',
+            lambda: f'author={next(authors)}',
+            lambda: 'is_favorited=1',
+            lambda: 'is_in_shopping_cart=1',
+        ))
+        return lambda: client.get(f'/api/recipes/?{next(queries)()}&limit=6')
+
+    def scenario_recipe_detail(self):
+        client = get_client(self.user)
+        recipe_ids = cycle(self.recipe_ids)
+        return lambda: client.get(f'/api/recipes/{next(recipe_ids)}/')
+
+    def scenario_subscriptions(self):
+        client = get_client(self.user)
+        return lambda: client.get(
+            '/api/users/subscriptions/?recipes_limit=3')
+
+    def scenario_ingredient_search(self):
+        client = get_client(self.user)
+        queries = cycle(SEARCH_QUERIES)
+        return lambda: client.get(f'/api/ingredients/?name={next(queries)}')
+
+    def scenario_ingredient_autocomplete(self):
+        client = get_client(self.user)
+        queries = cycle(SEARCH_QUERIES)
+        return lambda: client.get(
+            f'/api/ingredients/autocomplete/?name={next(queries)}')
+
+    def scenario_shopping_cart(self):
+        client = get_client(self.user)
+        return lambda: client.get(
+            '/api/recipes/download_shopping_cart/?format=pdf')
+
+    def scenario_recipe_create(self):
+        client = get_client(self.user)
+        names = (f'Новый рецепт {number}' for number in range(10 ** 9))
+
+        def request():
+            payload = self.get_payload(next(names))
+            payload['image'] = self.image
+            return client.post('/api/recipes/', payload, format='json')
+        return request
+
+    def scenario_recipe_update(self):
+        client = get_client(self.user)
+        recipe_ids = cycle(list(Recipe.objects.filter(
+            author=self.user).values_list('id', flat=True)[:20]))
+        names = (f'Изменённый рецепт {number}' for number in range(10 ** 9))
+        return lambda: client.patch(f'/api/recipes/{next(recipe_ids)}/',
+                                    self.get_payload(next(names)),
+                                    format='json')
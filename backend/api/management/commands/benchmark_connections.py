@@ -0,0 +1,75 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections, connections
+from django.db.backends.signals import connection_created
+
+from api.benchmarks import get_client, read_response, summary
+from users.models import User
+
+
+class ConnectionCounter:
+    def __init__(self):
+        self.created = 0
+        self.lock = threading.Lock()
+
+    def __call__(self, sender, connection, **kwargs):
+        with self.lock:
+            self.created += 1
+
+
+def run_worker(user, url, requests):
+    client = get_client(user)
+    timings = []
+    try:
+        for _ in range(requests):
+            started = time.perf_counter()
+            read_response(client.get(url))
+            # the test client does not close connections between requests
+            close_old_connections()
+            timings.append((time.perf_counter() - started) * 1000)
+    finally:
+        connections.close_all()
+    return timings
+
+
+class Command(BaseCommand):
+    help = 'measuring connection churn and latency for CONN_MAX_AGE values'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='/api/recipes/?limit=6')
+        parser.add_argument('--workers', type=int, default=8)
+        parser.add_argument('--requests', type=int, default=50)
+        parser.add_argument('--max-ages', nargs='+', type=int,
+                            default=[0, 60])
+
+    def handle(self, *args, **options):
+        user = User.objects.order_by('pk').first()
+        if user is None:
+            raise CommandError('В базе нет пользователей')
+        settings_dict = connections.databases['default']
+        initial_max_age = settings_dict['CONN_MAX_AGE']
+        counter = ConnectionCounter()
+        connection_created.connect(counter)
+        try:
+            for max_age in options['max_ages']:
+                settings_dict['CONN_MAX_AGE'] = max_age
+                counter.created = 0
+                started = time.perf_counter()
+                with ThreadPoolExecutor(options['workers']) as executor:
+                    timings = [timing for result in executor.map(
+                        lambda _: run_worker(user, options['url'],
+                                             options['requests']),
+                        range(options['workers'])) for timing in result]
+                elapsed = time.perf_counter() - started
+                stats = summary(timings)
+                self.stdout.write(
+                    f'CONN_MAX_AGE={max_age:<5} connections '
+                    f'{counter.created:>6}  p50 {stats["p50"]:8.2f} ms  '
+                    f'p99 {stats["p99"]:8.2f} ms  '
+                    f'{len(timings) / elapsed:8.1f} req/s')
+        finally:
+            settings_dict['CONN_MAX_AGE'] = initial_max_age
+            connection_created.disconnect(counter)
@@ -0,0 +1,58 @@
+import base64
+import io
+import os
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand
+from drf_extra_fields.fields import Base64ImageField
+from PIL import Image
+from rest_framework.exceptions import ValidationError
+
+from api.serializers import RecipeImageField
+
+MEGABYTE = 1024 ** 2
+
+
+def make_payload(side):
+    image = Image.frombytes('RGB', (side, side), os.urandom(side * side * 3))
+    buffer = io.BytesIO()
+    image.save(buffer, 'JPEG', quality=95)
+    return ('data:image/jpeg;base64,'
+            + base64.b64encode(buffer.getvalue()).decode())
+
+
+def measure_peak(field, payload):
+    tracemalloc.start()
+    started = time.perf_counter()
+    try:
+        field.to_internal_value(payload)
+        result = 'ok'
+    except ValidationError as error:
+        result = error.detail[0]
+    elapsed = (time.perf_counter() - started) * 1000
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak / MEGABYTE, elapsed, result
+
+
+class Command(BaseCommand):
+    help = 'measuring peak memory of decoding a base64 recipe image'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sides', nargs='+', type=int,
+                            default=[500, 1500, 3000])
+
+    def handle(self, *args, **options):
+        fields = (
+            ('base64', Base64ImageField()),
+            ('streaming', RecipeImageField()),
+        )
+        for side in options['sides']:
+            payload = make_payload(side)
+            self.stdout.write(f'{side}x{side}, base64 '
+                              f'{len(payload) / MEGABYTE:.2f} МБ')
+            for name, field in fields:
+                peak, elapsed, result = measure_peak(field, payload)
+                self.stdout.write(f'  {name:<10} peak {peak:8.2f} МБ  '
+                                  f'{elapsed:8.2f} ms  {result}')
@@ -0,0 +1,81 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from django.core.management.base import BaseCommand
+
+from api.benchmarks import summary
+
+PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+
+
+def iter_process_tree(pid):
+    yield pid
+    try:
+        with open(f'/proc/{pid}/task/{pid}/children') as children:
+            child_ids = [int(child) for child in children.read().split()]
+    except OSError:
+        return
+    for child_id in child_ids:
+        yield from iter_process_tree(child_id)
+
+
+def get_rss(pid):
+    total = 0
+    for process_id in iter_process_tree(pid):
+        try:
+            with open(f'/proc/{process_id}/statm') as statm:
+                total += int(statm.read().split()[1]) * PAGE_SIZE
+        except OSError:
+            continue
+    return total
+
+
+def fetch(session, url):
+    started = time.perf_counter()
+    try:
+        ok = session.get(url).status_code < 500
+    except requests.RequestException:
+        ok = False
+    return (time.perf_counter() - started) * 1000, ok
+
+
+class Command(BaseCommand):
+    help = 'measuring latency, throughput and memory of a running server'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--base-url', default='http://localhost:8000')
+        parser.add_argument('--paths', nargs='+', default=[
+            '/api/tags/',
+            '/api/ingredients/autocomplete/?name=с',
+            '/api/recipes/download_shopping_cart/?format=pdf',
+        ])
+        parser.add_argument('--token', default='')
+        parser.add_argument('--concurrency', nargs='+', type=int,
+                            default=[1, 8, 32])
+        parser.add_argument('--requests', type=int, default=200)
+        parser.add_argument('--pid', type=int,
+                            help='pid мастер-процесса сервера для замера RSS')
+
+    def handle(self, *args, **options):
+        session = requests.Session()
+        if options['token']:
+            session.headers['Authorization'] = f'Token {options["token"]}'
+        urls = [options['base_url'] + path for path in options['paths']]
+        for concurrency in options['concurrency']:
+            started = time.perf_counter()
+            with ThreadPoolExecutor(concurrency) as executor:
+                results = list(executor.map(
+                    lambda number: fetch(session, urls[number % len(urls)]),
+                    range(options['requests'])))
+            elapsed = time.perf_counter() - started
+            stats = summary([timing for timing, _ in results])
+            errors = sum(not ok for _, ok in results)
+            line = (f'concurrency {concurrency:>4}  p50 {stats["p50"]:8.2f} '
+                    f'ms  p99 {stats["p99"]:8.2f} ms  '
+                    f'{len(results) / elapsed:8.1f} req/s  '
+                    f'errors {errors}')
+            if options['pid']:
+                line += f'  rss {get_rss(options["pid"]) / 1024 ** 2:.1f} МБ'
+            self.stdout.write(line)
@@ -0,0 +1,62 @@
+import random
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from api.benchmarks import get_client, measure, summary
+from api.models import Cart, Ingredient, IngredientAmount, Recipe
+from api.shopping_list import FORMATS
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = 'measuring shopping list export latency for different carts'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', nargs='+', type=int,
+                            default=[10, 100, 1000])
+        parser.add_argument('--ingredients', type=int, default=10)
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--format', choices=FORMATS, default='pdf')
+
+    def handle(self, *args, **options):
+        ingredient_ids = list(Ingredient.objects.values_list('id', flat=True))
+        if len(ingredient_ids) < options['ingredients']:
+            raise CommandError('Недостаточно ингредиентов в базе, '
+                               'выполните load_ingredients')
+        url = ('/api/recipes/download_shopping_cart/'
+               f'?format={options["format"]}')
+        with transaction.atomic():
+            user = User.objects.create_user(
+                username='shopping-cart-benchmark',
+                email='shopping-cart-benchmark@example.com')
+            recipes = self.create_recipes(user, max(options['sizes']),
+                                          ingredient_ids,
+                                          options['ingredients'])
+            client = get_client(user)
+            in_cart = 0
+            for size in sorted(options['sizes']):
+                Cart.objects.bulk_create(
+                    Cart(user=user, recipe=recipe)
+                    for recipe in recipes[in_cart:size])
+                in_cart = size
+                timings = summary(measure(lambda: client.get(url),
+                                          options['repeat']))
+                self.stdout.write(
+                    f'{size:>6} recipes  p50 {timings["p50"]:8.2f} ms  '
+                    f'p99 {timings["p99"]:8.2f} ms')
+            transaction.set_rollback(True)
+
+    def create_recipes(self, user, count, ingredient_ids, per_recipe):
+        recipes = Recipe.objects.bulk_create(
+            Recipe(author=user, name=f'Рецепт {number}', text='',
+                   image='recipes/benchmark.png', cooking_time=1)
+            for number in range(count))
+        if not all(recipe.pk for recipe in recipes):
+            recipes = list(Recipe.objects.filter(author=user).order_by('id'))
+        IngredientAmount.objects.bulk_create(
+            IngredientAmount(recipe=recipe, ingredient_id=ingredient_id,
+                             amount=random.randint(1, 500))
+            for recipe in recipes
+            for ingredient_id in random.sample(ingredient_ids, per_recipe))
+        return recipes
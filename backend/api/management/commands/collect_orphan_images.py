@@ -0,0 +1,72 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from api.images import IMAGE_DIR, VARIANTS, get_variant_name
+from api.models import Recipe
+from api.storage import recipe_image_storage
+
+
+def get_referenced_names():
+    names = set()
+    for image, variant in Recipe.objects.exclude(image='').values_list(
+            'image', 'image_variant').iterator():
+        names.add(image)
+        if variant:
+            names.update(get_variant_name(variant, size) for size in VARIANTS)
+    return names
+
+
+def iter_batches(names, size):
+    batch = []
+    for name in names:
+        batch.append(name)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def still_referenced(batch):
+    originals = set(Recipe.objects.filter(image__in=batch).values_list(
+        'image', flat=True))
+    variants = {name.rsplit('/', 1)[-1] for name in batch}
+    originals.update(
+        get_variant_name(variant, size)
+        for variant in Recipe.objects.filter(
+            image_variant__in=variants).values_list(
+                'image_variant', flat=True)
+        for size in VARIANTS)
+    return originals
+
+
+class Command(BaseCommand):
+    help = 'removing recipe images that are no longer referenced'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--min-age', type=int, default=60 * 60,
+                            help='не трогать файлы моложе N секунд')
+        parser.add_argument('--dry-run', action='store_true')
+
+    def handle(self, *args, **options):
+        referenced = get_referenced_names()
+        threshold = time.time() - options['min_age']
+        orphans = (
+            name for name in recipe_image_storage.iter_files(IMAGE_DIR)
+            if name not in referenced
+            and recipe_image_storage.get_modified_time(
+                name).timestamp() < threshold
+        )
+        removed = freed = 0
+        for batch in iter_batches(orphans, options['batch_size']):
+            for name in set(batch) - still_referenced(batch):
+                size = recipe_image_storage.size(name)
+                if not options['dry_run']:
+                    recipe_image_storage.delete(name)
+                removed += 1
+                freed += size
+        action = 'Будет удалено' if options['dry_run'] else 'Удалено'
+        self.stdout.write(f'{action} файлов: {removed}, '
+                          f'{freed / 1024 ** 2:.2f} МБ')
@@ -0,0 +1,20 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from api.metrics import collect, render_metrics
+
+
+class Command(BaseCommand):
+    help = 'printing aggregated per-endpoint request metrics'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--json', action='store_true')
+
+    def handle(self, *args, **options):
+        endpoints = collect()
+        if options['json']:
+            self.stdout.write(json.dumps(endpoints, indent=2,
+                                         ensure_ascii=False))
+        else:
+            self.stdout.write(render_metrics(endpoints), ending='')
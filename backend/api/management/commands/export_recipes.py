@@ -0,0 +1,78 @@
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from api.images import encode_image
+from api.models import Recipe
+
+
+def iter_chunks(size):
+    last_id = 0
+    while True:
+        recipes = list(Recipe.objects.filter(id__gt=last_id).select_related(
+            'author').prefetch_related(
+            'tags', 'ingredientamount_set__ingredient').order_by('id')[:size])
+        if not recipes:
+            return
+        yield recipes
+        last_id = recipes[-1].id
+
+
+def serialize_recipe(recipe, image):
+    return {
+        'name': recipe.name,
+        'text': recipe.text,
+        'cooking_time': recipe.cooking_time,
+        'image': image,
+        'author': {
+            'email': recipe.author.email,
+            'username': recipe.author.username,
+            'first_name': recipe.author.first_name,
+            'last_name': recipe.author.last_name,
+        },
+        'tags': [tag.slug for tag in recipe.tags.all()],
+        'ingredients': [
+            {
+                'name': item.ingredient.name,
+                'measurement_unit': item.ingredient.measurement_unit,
+                'amount': item.amount,
+            }
+            for item in recipe.ingredientamount_set.all()
+        ],
+    }
+
+
+class Command(BaseCommand):
+    help = 'exporting recipes to ndjson file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('filename', type=str)
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--workers', type=int, default=os.cpu_count())
+        parser.add_argument('--no-images', action='store_true')
+
+    def handle(self, *args, **options):
+        connections.close_all()
+        started = time.perf_counter()
+        exported = 0
+        with open(options['filename'], 'w', encoding='utf-8') as output, \
+                ProcessPoolExecutor(options['workers'],
+                                    initializer=django.setup) as pool:
+            for recipes in iter_chunks(options['batch_size']):
+                if options['no_images']:
+                    images = [None] * len(recipes)
+                else:
+                    images = pool.map(encode_image, [
+                        recipe.image.name for recipe in recipes])
+                for recipe, image in zip(recipes, images):
+                    output.write(json.dumps(serialize_recipe(recipe, image),
+                                            ensure_ascii=False) + '\n')
+                exported += len(recipes)
+                elapsed = time.perf_counter() - started
+                self.stdout.write(f'Выгружено рецептов: {exported} '
+                                  f'({exported / elapsed:.0f} в сек.)')
@@ -0,0 +1,168 @@
+import io
+import random
+from contextlib import ExitStack
+from itertools import accumulate
+
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from PIL import Image
+
+from api.benchmarks import temporary_media_root
+from api.models import (
+    Cart,
+    Favorite,
+    Ingredient,
+    IngredientAmount,
+    Recipe,
+    Tag
+)
+from api.reference import invalidate_reference
+from api.response_cache import invalidate_responses
+from api.storage import recipe_image_storage
+from users.models import Follow, User
+
+TAGS = (
+    ('Завтрак', Tag.ORANGE, 'breakfast'),
+    ('Обед', Tag.GREEN, 'lunch'),
+    ('Ужин', Tag.PURPLE, 'dinner'),
+    ('Десерт', Tag.YELLOW, 'dessert'),
+    ('Перекус', Tag.BLUE, 'snack'),
+)
+PASSWORD = 'benchmark-password'
+
+
+def zipf_weights(count, exponent):
+    return list(accumulate(1 / rank ** exponent
+                           for rank in range(1, count + 1)))
+
+
+def sample_unique(population, cum_weights, count):
+    count = min(count, len(population))
+    chosen = set()
+    for _ in range(10):
+        if len(chosen) >= count:
+            break
+        chosen.update(random.choices(population, cum_weights=cum_weights,
+                                     k=count - len(chosen)))
+    return chosen
+
+
+def save_placeholder_image():
+    buffer = io.BytesIO()
+    Image.new('RGB', (640, 480), '#FFA500').save(buffer, 'JPEG')
+    return recipe_image_storage.save('recipes/placeholder.jpg',
+                                     ContentFile(buffer.getvalue()))
+
+
+class Command(BaseCommand):
+    help = 'generating a synthetic dataset for benchmarks'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100)
+        parser.add_argument('--recipes', type=int, default=1000)
+        parser.add_argument('--ingredients', nargs=2, type=int,
+                            default=[3, 12], metavar=('MIN', 'MAX'))
+        parser.add_argument('--tags', nargs=2, type=int, default=[1, 3],
+                            metavar=('MIN', 'MAX'))
+        parser.add_argument('--favorites', type=int, default=20)
+        parser.add_argument('--cart', type=int, default=10)
+        parser.add_argument('--follows', type=int, default=10)
+        parser.add_argument('--skew', type=float, default=1.0,
+                            help='показатель распределения Ципфа')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--prefix', default='bench')
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--dry-run', action='store_true',
+                            help='откатить данные и удалить картинки '
+                                 'после генерации')
+
+    def handle(self, *args, **options):
+        random.seed(options['seed'])
+        with ExitStack() as stack:
+            if options['dry_run']:
+                stack.enter_context(temporary_media_root())
+            with transaction.atomic():
+                if not Ingredient.objects.exists():
+                    call_command('load_ingredients', 'ingredients.json')
+                if not Tag.objects.exists():
+                    Tag.objects.bulk_create(
+                        Tag(name=name, color=color, slug=slug)
+                        for name, color, slug in TAGS)
+                users = self.create_users(options)
+                recipes = self.create_recipes(users, options)
+                self.create_relations(users, recipes, options)
+                transaction.set_rollback(options['dry_run'])
+        if not options['dry_run']:
+            call_command('reconcile_counters', stdout=self.stdout)
+            invalidate_reference()
+            invalidate_responses('recipes', 'tags', 'ingredients')
+        action = 'Будет создано' if options['dry_run'] else 'Создано'
+        self.stdout.write(f'{action} пользователей: {len(users)}, '
+                          f'рецептов: {len(recipes)}')
+
+    def create_users(self, options):
+        start = User.objects.filter(
+            username__startswith=f'{options["prefix"]}_').count()
+        password = make_password(PASSWORD)
+        User.objects.bulk_create((
+            User(username=f'{options["prefix"]}_{number}',
+                 email=f'{options["prefix"]}_{number}@example.com',
+                 first_name='Пользователь', last_name=str(number),
+                 password=password)
+            for number in range(start, start + options['users'])
+        ), batch_size=options['batch_size'])
+        return list(User.objects.filter(
+            username__startswith=f'{options["prefix"]}_').order_by(
+                '-id')[:options['users']])
+
+    def create_recipes(self, users, options):
+        image = save_placeholder_image()
+        authors = random.choices(
+            users, cum_weights=zipf_weights(len(users), options['skew']),
+            k=options['recipes'])
+        recipes = Recipe.objects.bulk_create((
+            Recipe(author=author, name=f'Рецепт {number}',
+                   text='Сгенерированный рецепт', image=image,
+                   cooking_time=random.randint(5, 180))
+            for number, author in enumerate(authors)
+        ), batch_size=options['batch_size'])
+        if not all(recipe.pk for recipe in recipes):
+            recipes = list(Recipe.objects.filter(
+                author__in=users).order_by('-id')[:options['recipes']])
+        ingredient_ids = list(Ingredient.objects.values_list('id', flat=True))
+        tag_ids = list(Tag.objects.values_list('id', flat=True))
+        IngredientAmount.objects.bulk_create((
+            IngredientAmount(recipe=recipe, ingredient_id=ingredient_id,
+                             amount=random.randint(1, 500))
+            for recipe in recipes
+            for ingredient_id in random.sample(
+                ingredient_ids, random.randint(*options['ingredients']))
+        ), batch_size=options['batch_size'])
+        Recipe.tags.through.objects.bulk_create((
+            Recipe.tags.through(recipe=recipe, tag_id=tag_id)
+            for recipe in recipes
+            for tag_id in random.sample(
+                tag_ids, min(random.randint(*options['tags']),
+                             len(tag_ids)))
+        ), batch_size=options['batch_size'])
+        return recipes
+
+    def create_relations(self, users, recipes, options):
+        recipe_weights = zipf_weights(len(recipes), options['skew'])
+        user_weights = zipf_weights(len(users), options['skew'])
+        for model, field, population, weights, option in (
+            (Favorite, 'recipe', recipes, recipe_weights, 'favorites'),
+            (Cart, 'recipe', recipes, recipe_weights, 'cart'),
+            (Follow, 'author', users, user_weights, 'follows'),
+        ):
+            model.objects.bulk_create((
+                model(user=user, **{field: target})
+                for user in users
+                for target in sample_unique(
+                    population, weights,
+                    random.randint(0, options[option] * 2))
+                if target != user
+            ), batch_size=options['batch_size'], ignore_conflicts=True)
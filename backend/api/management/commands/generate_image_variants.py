@@ -0,0 +1,34 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from api.images import process_recipe_image
+from api.models import Recipe
+
+
+class Command(BaseCommand):
+    help = 'generating resized copies of recipe images'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true')
+        parser.add_argument('--workers', type=int,
+                            default=settings.IMAGE_WORKERS)
+
+    def handle(self, *args, **options):
+        recipes = Recipe.objects.exclude(image='')
+        if not options['all']:
+            recipes = recipes.filter(image_variant='')
+        rows = list(recipes.values_list('id', 'image').iterator())
+        unique = {image: recipe_id for recipe_id, image in rows}
+        first = set(unique.values())
+        processed = 0
+        with ThreadPoolExecutor(max_workers=options['workers']) as executor:
+            for batch in (
+                [(recipe_id, image) for image, recipe_id in unique.items()],
+                [row for row in rows if row[0] not in first],
+            ):
+                results = executor.map(
+                    lambda recipe: process_recipe_image(*recipe), batch)
+                processed += sum(result is not None for result in results)
+        self.stdout.write(f'Обработано изображений: {processed}')
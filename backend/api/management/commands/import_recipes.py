@@ -0,0 +1,181 @@
+import json
+import os
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections, transaction
+
+from api.images import save_image
+from api.models import Ingredient, IngredientAmount, Recipe, Tag
+from api.reference import invalidate_reference
+from api.response_cache import invalidate_responses
+from users.models import User, UserStats
+
+
+ROW_KEYS = ('name', 'text', 'cooking_time', 'author', 'ingredients', 'tags')
+INGREDIENT_KEYS = ('name', 'measurement_unit', 'amount')
+
+
+def parse_row(line):
+    row = json.loads(line)
+    if not isinstance(row, dict):
+        raise ValueError('ожидается объект рецепта')
+    missing = [key for key in ROW_KEYS if key not in row]
+    if missing:
+        raise ValueError(f'отсутствуют поля: {", ".join(missing)}')
+    if not isinstance(row['author'], dict) or 'email' not in row['author']:
+        raise ValueError('у автора не указан email')
+    for item in row['ingredients']:
+        if not isinstance(item, dict) or any(
+                key not in item for key in INGREDIENT_KEYS):
+            raise ValueError('у ингредиента должны быть поля '
+                             f'{", ".join(INGREDIENT_KEYS)}')
+    return row
+
+
+def iter_batches(lines, size):
+    batch = []
+    for number, line in enumerate(lines, 1):
+        if line.strip():
+            try:
+                batch.append(parse_row(line))
+            except (TypeError, ValueError) as error:
+                raise CommandError(f'Строка {number}: {error}')
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class RecipeImporter:
+    def __init__(self, pool):
+        self.pool = pool
+        self.authors = {}
+        self.tags = dict(Tag.objects.values_list('slug', 'id'))
+        self.ingredients = {
+            (name, measurement_unit): pk
+            for pk, name, measurement_unit in Ingredient.objects.values_list(
+                'id', 'name', 'measurement_unit')
+        }
+        self.skipped = 0
+
+    def load_authors(self, rows):
+        authors = {row['author']['email']: row['author'] for row in rows}
+        missing = authors.keys() - self.authors.keys()
+        self.authors.update(User.objects.filter(
+            email__in=missing).values_list('email', 'id'))
+        for email in missing - self.authors.keys():
+            author = authors[email]
+            user = User.objects.create_user(
+                username=author.get('username') or email,
+                email=email,
+                first_name=author.get('first_name', ''),
+                last_name=author.get('last_name', ''),
+            )
+            self.authors[email] = user.id
+
+    def load_ingredients(self, rows):
+        missing = {
+            (item['name'], item['measurement_unit'])
+            for row in rows for item in row['ingredients']
+        } - self.ingredients.keys()
+        if not missing:
+            return
+        Ingredient.objects.bulk_create(
+            (Ingredient(name=name, measurement_unit=measurement_unit)
+             for name, measurement_unit in missing),
+            ignore_conflicts=True,
+        )
+        for pk, name, measurement_unit in Ingredient.objects.filter(
+                name__in={name for name, _ in missing}).values_list(
+                'id', 'name', 'measurement_unit'):
+            self.ingredients[name, measurement_unit] = pk
+        invalidate_reference()
+
+    def build_recipe(self, row, image):
+        return Recipe(
+            author_id=self.authors[row['author']['email']],
+            name=row['name'],
+            text=row['text'],
+            cooking_time=row['cooking_time'],
+            image=image,
+        )
+
+    def create_recipes(self, recipes):
+        if connection.features.can_return_rows_from_bulk_insert:
+            recipes = Recipe.objects.bulk_create(recipes)
+            authors = Counter(recipe.author_id for recipe in recipes)
+            for author_id, count in authors.items():
+                UserStats.objects.increment(author_id, 'recipes_count', count)
+            return recipes
+        for recipe in recipes:
+            recipe.save()
+        return recipes
+
+    def create_relations(self, rows, recipes):
+        IngredientAmount.objects.bulk_create(
+            IngredientAmount(
+                recipe=recipe,
+                ingredient_id=self.ingredients[
+                    item['name'], item['measurement_unit']],
+                amount=item['amount'],
+            )
+            for row, recipe in zip(rows, recipes)
+            for item in row['ingredients']
+        )
+        Recipe.tags.through.objects.bulk_create(
+            Recipe.tags.through(recipe_id=recipe.id, tag_id=self.tags[slug])
+            for row, recipe in zip(rows, recipes)
+            for slug in row['tags'] if slug in self.tags
+        )
+
+    def import_batch(self, rows):
+        images = self.pool.map(save_image, [row.get('image') for row in rows])
+        self.load_authors(rows)
+        pairs = [(row, self.build_recipe(row, image))
+                 for row, image in zip(rows, images) if image]
+        self.skipped += len(rows) - len(pairs)
+        if not pairs:
+            return 0
+        rows, recipes = zip(*pairs)
+        with transaction.atomic():
+            self.load_ingredients(rows)
+            recipes = self.create_recipes(list(recipes))
+            self.create_relations(rows, recipes)
+        return len(recipes)
+
+
+class Command(BaseCommand):
+    help = 'importing recipes from ndjson file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('filename', type=str)
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--workers', type=int, default=os.cpu_count())
+
+    def handle(self, *args, **options):
+        connections.close_all()
+        started = time.perf_counter()
+        imported = 0
+        try:
+            with open(options['filename'], encoding='utf-8') as lines, \
+                    ProcessPoolExecutor(options['workers'],
+                                        initializer=django.setup) as pool:
+                importer = RecipeImporter(pool)
+                for rows in iter_batches(lines, options['batch_size']):
+                    imported += importer.import_batch(rows)
+                    elapsed = time.perf_counter() - started
+                    self.stdout.write(f'Загружено рецептов: {imported} '
+                                      f'({imported / elapsed:.0f} в сек.)')
+        except FileNotFoundError:
+            raise CommandError('Файл не найден')
+        finally:
+            if imported:
+                invalidate_responses('recipes', 'ingredients')
+        if importer.skipped:
+            self.stdout.write(f'Пропущено рецептов без корректной '
+                              f'картинки: {importer.skipped}')
@@ -1,36 +1,114 @@
+import csv
 import json
 import os
+import time
 
 from django.conf import settings
 from django.core.management.base import BaseCommand, CommandError
-from django.db.utils import IntegrityError
 
 from api.models import Ingredient
+from api.reference import invalidate_reference
+from api.response_cache import invalidate_responses
+from api.shopping_list import invalidate_catalogue
 
 DATA_ROOT = os.path.join(settings.BASE_DIR, 'data')
+CHUNK_SIZE = 64 * 1024
+CSV_HEADER = ['name', 'measurement_unit']
+
+
+def iter_json(file):
+    decoder = json.JSONDecoder()
+    buffer = ''
+    started = False
+    while True:
+        chunk = file.read(CHUNK_SIZE)
+        buffer = (buffer + chunk).lstrip()
+        if not started and buffer:
+            if not buffer.startswith('['):
+                raise CommandError('Ожидается JSON-массив ингредиентов')
+            buffer = buffer[1:]
+            started = True
+        while True:
+            buffer = buffer.lstrip(' \t\r\n,')
+            if not buffer or buffer.startswith(']'):
+                break
+            try:
+                item, end = decoder.raw_decode(buffer)
+            except json.JSONDecodeError:
+                if not chunk:
+                    raise CommandError('Некорректный JSON в файле')
+                break
+            yield item['name'], item['measurement_unit']
+            buffer = buffer[end:]
+        if not chunk:
+            return
+
+
+def iter_csv(file):
+    for row in csv.reader(file):
+        if row and row != CSV_HEADER:
+            yield row[0], row[1]
+
+
+READERS = {
+    '.json': iter_json,
+    '.csv': iter_csv,
+}
+
+
+def iter_batches(rows, size):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
 
 
 class Command(BaseCommand):
-    help = 'loading ingredients from data in json'
+    help = 'loading ingredients from data in json or csv'
 
     def add_arguments(self, parser):
         parser.add_argument('filename', default='ingredients.json', nargs='?',
                             type=str)
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--dry-run', action='store_true')
 
     def handle(self, *args, **options):
+        extension = os.path.splitext(options['filename'])[1].lower()
+        if extension not in READERS:
+            raise CommandError('Поддерживаются только файлы json и csv')
+        started = time.perf_counter()
         try:
             with open(os.path.join(DATA_ROOT, options['filename']), 'r',
                       encoding='utf-8') as f:
-                data = json.load(f)
-                for ingredient in data:
-                    try:
-                        Ingredient.objects.create(name=ingredient["name"],
-                                                  measurement_unit=ingredient[
-                                                      "measurement_unit"])
-                    except IntegrityError:
-                        print(f'Ингридиет {ingredient["name"]} '
-                              f'{ingredient["measurement_unit"]} '
-                              f'уже есть в базе')
-
+                read, created = self.load(READERS[extension](f), options)
         except FileNotFoundError:
             raise CommandError('Файл отсутствует в директории data')
+        elapsed = time.perf_counter() - started
+        action = 'будет добавлено' if options['dry_run'] else 'добавлено'
+        self.stdout.write(f'Прочитано строк: {read}, {action} ингредиентов: '
+                          f'{created} за {elapsed:.2f} с '
+                          f'({read / elapsed:.0f} строк в сек.)')
+
+    def load(self, rows, options):
+        seen = set(Ingredient.objects.values_list('name', 'measurement_unit'))
+        read = created = 0
+        for batch in iter_batches(rows, options['batch_size']):
+            read += len(batch)
+            new = []
+            for row in batch:
+                if row not in seen:
+                    seen.add(row)
+                    new.append(Ingredient(name=row[0],
+                                          measurement_unit=row[1]))
+            created += len(new)
+            if new and not options['dry_run']:
+                Ingredient.objects.bulk_create(new, ignore_conflicts=True)
+        if created and not options['dry_run']:
+            invalidate_reference()
+            invalidate_catalogue()
+            invalidate_responses('ingredients')
+        return read, created
@@ -0,0 +1,69 @@
+from functools import reduce
+from operator import or_
+
+from django.core.management.base import BaseCommand
+from django.db.models import Count, F, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+
+from api.models import Cart, Favorite, Recipe
+from users.models import Follow, User, UserStats
+
+
+def count_for(model, field):
+    return Coalesce(Subquery(
+        model.objects.filter(**{field: OuterRef('pk')}).order_by().values(
+            field).annotate(total=Count('id')).values('total')
+    ), 0)
+
+
+def iter_id_ranges(queryset, size):
+    last_id = 0
+    while True:
+        ids = list(queryset.filter(pk__gt=last_id).order_by('pk').values_list(
+            'pk', flat=True)[:size])
+        if not ids:
+            return
+        yield ids[0], ids[-1]
+        last_id = ids[-1]
+
+
+def reconcile(model, counters, batch_size):
+    fields = list(counters)
+    actual = {f'actual_{field}': counters[field] for field in fields}
+    drifted = reduce(or_, (~Q(**{field: F(f'actual_{field}')})
+                           for field in fields))
+    fixed = 0
+    for first, last in iter_id_ranges(model.objects.all(), batch_size):
+        rows = model.objects.filter(pk__gte=first, pk__lte=last).annotate(
+            **actual).filter(drifted).values_list('pk', *actual)
+        objects = [model(pk=pk, **dict(zip(fields, values)))
+                   for pk, *values in rows]
+        model.objects.bulk_update(objects, fields)
+        fixed += len(objects)
+    return fixed
+
+
+class Command(BaseCommand):
+    help = 'recomputing denormalized favorite, cart and follower counters'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        recipes = reconcile(Recipe, {
+            'favorites_count': count_for(Favorite, 'recipe'),
+            'cart_count': count_for(Cart, 'recipe'),
+        }, batch_size)
+        UserStats.objects.bulk_create(
+            (UserStats(user_id=pk) for pk in User.objects.filter(
+                stats__isnull=True).values_list('pk', flat=True).iterator()),
+            batch_size=batch_size,
+            ignore_conflicts=True,
+        )
+        users = reconcile(UserStats, {
+            'recipes_count': count_for(Recipe, 'author'),
+            'followers_count': count_for(Follow, 'author'),
+        }, batch_size)
+        self.stdout.write(f'Исправлено счётчиков рецептов: {recipes}, '
+                          f'пользователей: {users}')
@@ -0,0 +1,209 @@
+import bisect
+import os
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.http import Http404, HttpResponse
+from rest_framework.serializers import ListSerializer, Serializer
+
+from users.authentication import token_cache
+
+PROCESSES_KEY = 'metrics:processes'
+PROCESS_KEY = 'metrics:process:{}'
+BUCKETS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+TIMINGS = ('total', 'db', 'serializer')
+
+_local = threading.local()
+_installed = False
+
+
+class RequestMetrics:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db = self.serializer = self.total = 0.0
+        self.serializer_depth = 0
+
+    def record_query(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.db += (time.perf_counter() - started) * 1000
+
+    def finish(self):
+        self.total = (time.perf_counter() - self.started) * 1000
+
+    def server_timing(self):
+        return (f'db;desc="{self.queries} queries";dur={self.db:.1f}, '
+                f'serializer;dur={self.serializer:.1f}, '
+                f'total;dur={self.total:.1f}')
+
+
+def get_current():
+    return getattr(_local, 'metrics', None)
+
+
+def timed_data(get_data):
+    def data(serializer):
+        metrics = get_current()
+        if metrics is None or metrics.serializer_depth:
+            return get_data(serializer)
+        metrics.serializer_depth += 1
+        started = time.perf_counter()
+        try:
+            return get_data(serializer)
+        finally:
+            metrics.serializer_depth -= 1
+            metrics.serializer += (time.perf_counter() - started) * 1000
+    return data
+
+
+def install_serializer_timer():
+    global _installed
+    if not _installed:
+        for serializer_class in (Serializer, ListSerializer):
+            serializer_class.data = property(
+                timed_data(serializer_class.data.fget))
+        _installed = True
+
+
+def new_endpoint():
+    return {
+        'count': 0,
+        'queries': 0,
+        'buckets': [0] * (len(BUCKETS) + 1),
+        **{timing: 0.0 for timing in TIMINGS},
+    }
+
+
+class Registry:
+    def __init__(self):
+        self.endpoints = defaultdict(new_endpoint)
+        self.lock = threading.Lock()
+        self.flushed = 0.0
+
+    def observe(self, endpoint, metrics):
+        with self.lock:
+            stats = self.endpoints[endpoint]
+            stats['count'] += 1
+            stats['queries'] += metrics.queries
+            stats['buckets'][bisect.bisect_left(BUCKETS, metrics.total)] += 1
+            for timing in TIMINGS:
+                stats[timing] += getattr(metrics, timing)
+
+    def snapshot(self):
+        with self.lock:
+            return {endpoint: dict(stats, buckets=list(stats['buckets']))
+                    for endpoint, stats in self.endpoints.items()}
+
+    def flush(self, force=False):
+        now = time.monotonic()
+        if not force and now - self.flushed < settings.METRICS_FLUSH_INTERVAL:
+            return
+        self.flushed = now
+        pid = os.getpid()
+        cache.set(PROCESS_KEY.format(pid), self.snapshot(), get_timeout())
+        processes = cache.get(PROCESSES_KEY, set())
+        if pid in processes:
+            cache.touch(PROCESSES_KEY, get_timeout())
+        else:
+            cache.set(PROCESSES_KEY, processes | {pid}, get_timeout())
+
+
+registry = Registry()
+
+
+def get_timeout():
+    return settings.METRICS_FLUSH_INTERVAL * 10
+
+
+def collect():
+    processes = cache.get(PROCESSES_KEY, set())
+    keys = {PROCESS_KEY.format(pid): pid for pid in processes}
+    snapshots = cache.get_many(keys)
+    expired = processes - {keys[key] for key in snapshots}
+    if expired:
+        cache.set(PROCESSES_KEY, cache.get(PROCESSES_KEY, set()) - expired,
+                  get_timeout())
+    merged = defaultdict(new_endpoint)
+    for snapshot in snapshots.values():
+        for endpoint, stats in snapshot.items():
+            total = merged[endpoint]
+            for key, value in stats.items():
+                if key == 'buckets':
+                    total[key] = [a + b for a, b in zip(total[key], value)]
+                else:
+                    total[key] += value
+    return dict(merged)
+
+
+def render_metrics(endpoints):
+    lines = []
+    for endpoint, stats in sorted(endpoints.items()):
+        label = f'endpoint="{endpoint}"'
+        cumulative = 0
+        for bound, count in zip((*BUCKETS, '+Inf'), stats['buckets']):
+            cumulative += count
+            lines.append('foodgram_request_duration_ms_bucket'
+                         f'{{{label},le="{bound}"}} {cumulative}')
+        lines.append(f'foodgram_request_duration_ms_sum{{{label}}} '
+                     f'{stats["total"]:.3f}')
+        lines.append(f'foodgram_request_duration_ms_count{{{label}}} '
+                     f'{stats["count"]}')
+        lines.append(f'foodgram_request_queries_total{{{label}}} '
+                     f'{stats["queries"]}')
+        lines.append(f'foodgram_request_db_ms_total{{{label}}} '
+                     f'{stats["db"]:.3f}')
+        lines.append(f'foodgram_request_serializer_ms_total{{{label}}} '
+                     f'{stats["serializer"]:.3f}')
+    for name, value in token_cache.stats().items():
+        lines.append(f'foodgram_token_cache_{name}{{pid="{os.getpid()}"}} '
+                     f'{value}')
+    return '\n'.join(lines) + '\n'
+
+
+def get_endpoint_name(request, view_func):
+    view_class = getattr(view_func, 'cls', None)
+    if view_class is None:
+        return f'{view_func.__module__}.{view_func.__name__}'
+    actions = getattr(view_func, 'actions', None) or {}
+    action = actions.get(request.method.lower(), request.method.lower())
+    return f'{view_class.__name__}.{action}'
+
+
+class MetricsMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+        install_serializer_timer()
+
+    def __call__(self, request):
+        metrics = _local.metrics = RequestMetrics()
+        try:
+            with connection.execute_wrapper(metrics.record_query):
+                response = self.get_response(request)
+        finally:
+            _local.metrics = None
+        metrics.finish()
+        endpoint = getattr(request, 'metrics_endpoint', None)
+        if endpoint is not None:
+            registry.observe(endpoint, metrics)
+            registry.flush()
+        response['Server-Timing'] = metrics.server_timing()
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.metrics_endpoint = get_endpoint_name(request, view_func)
+
+
+def metrics_view(request):
+    if not settings.METRICS_ENABLED:
+        raise Http404
+    registry.flush(force=True)
+    return HttpResponse(render_metrics(collect()),
+                        content_type='text/plain; version=0.0.4')
@@ -0,0 +1,37 @@
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+INDEXES = (
+    ('api_ingredient_name_upper_like',
+     'CREATE INDEX IF NOT EXISTS api_ingredient_name_upper_like '
+     'ON api_ingredient (UPPER(name::text) text_pattern_ops)'),
+    ('api_ingredient_name_upper_trgm',
+     'CREATE INDEX IF NOT EXISTS api_ingredient_name_upper_trgm '
+     'ON api_ingredient USING gin (UPPER(name::text) gin_trgm_ops)'),
+)
+
+
+def create_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for _, sql in INDEXES:
+        schema_editor.execute(sql)
+
+
+def drop_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name, _ in INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {name}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0003_auto_20211008_0008'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.RunPython(create_indexes, drop_indexes),
+    ]
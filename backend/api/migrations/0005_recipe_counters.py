@@ -0,0 +1,43 @@
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_for_recipe(model):
+    return Coalesce(Subquery(
+        model.objects.filter(recipe=OuterRef('pk')).values(
+            'recipe').annotate(total=Count('id')).values('total')
+    ), 0)
+
+
+def fill_counters(apps, schema_editor):
+    Recipe = apps.get_model('api', 'Recipe')
+    Recipe.objects.update(
+        favorites_count=count_for_recipe(apps.get_model('api', 'Favorite')),
+        cart_count=count_for_recipe(apps.get_model('api', 'Cart')),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0004_ingredient_name_search_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='cart_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='В списках покупок'),
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='favorites_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='В избранном'),
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['favorites_count', 'id'], name='recipe_popularity_idx'),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,20 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0005_recipe_counters'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='ingredientamount',
+            index=models.Index(fields=['recipe', 'ingredient'], name='ingredientamount_recipe_idx'),
+        ),
+        migrations.RunSQL(
+            'CREATE INDEX recipe_tags_tag_recipe_idx '
+            'ON api_recipe_tags (tag_id, recipe_id)',
+            'DROP INDEX recipe_tags_tag_recipe_idx',
+        ),
+    ]
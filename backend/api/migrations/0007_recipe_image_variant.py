@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='image_variant',
+            field=models.CharField(blank=True, editable=False, max_length=100, verbose_name='Уменьшенные копии картинки'),
+        ),
+    ]
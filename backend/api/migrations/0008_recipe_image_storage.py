@@ -0,0 +1,17 @@
+import api.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0007_recipe_image_variant'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='recipe',
+            name='image',
+            field=models.ImageField(storage=api.storage.ContentAddressedStorage(), upload_to='recipes/', verbose_name='Картинка рецепта'),
+        ),
+    ]
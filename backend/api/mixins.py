@@ -0,0 +1,108 @@
+from functools import partial
+
+from django.conf import settings
+from django.utils.cache import (
+    get_conditional_response,
+    patch_cache_control,
+    patch_vary_headers
+)
+from django.utils.http import http_date, quote_etag
+from rest_framework.exceptions import NotFound
+from rest_framework.response import Response
+
+from api.pagination import LimitCursorPagination
+from api.reference import get_reference
+from api.response_cache import (
+    get_response,
+    get_version,
+    make_etag,
+    set_response
+)
+
+
+class ReferenceDataMixin:
+    def filter_items(self, items):
+        return items
+
+    def list(self, request, *args, **kwargs):
+        items = list(self.filter_items(
+            get_reference().iter_items(self.reference_kind)))
+        serializer = self.get_serializer(items, many=True)
+        return Response(serializer.data)
+
+    def retrieve(self, request, *args, **kwargs):
+        try:
+            item = get_reference().get_item(self.reference_kind,
+                                            int(kwargs['pk']))
+        except (KeyError, ValueError):
+            raise NotFound
+        serializer = self.get_serializer(item)
+        return Response(serializer.data)
+
+
+class CursorPaginationMixin:
+    cursor_pagination_class = LimitCursorPagination
+
+    @property
+    def paginator(self):
+        if not hasattr(self, '_paginator'):
+            if (self.cursor_pagination_class is not None
+                    and self.cursor_pagination_class.cursor_query_param
+                    in self.request.query_params):
+                self._paginator = self.cursor_pagination_class()
+            elif self.pagination_class is None:
+                self._paginator = None
+            else:
+                self._paginator = self.pagination_class()
+        return self._paginator
+
+
+class AnonymousCacheMixin:
+    cache_scope = None
+    cache_query_params = ()
+
+    def get_response_etag(self, request):
+        if (not settings.CACHE_SHARED or request.method != 'GET'
+                or request.user.is_authenticated):
+            return None
+        params = request.query_params
+        if any(name not in self.cache_query_params for name in params):
+            return None
+        token, modified = get_version(self.cache_scope)
+        parts = [token, request.build_absolute_uri(request.path),
+                 request.accepted_renderer.format]
+        parts.extend(f'{name}={value}' for name in sorted(params)
+                     for value in sorted(params.getlist(name)))
+        return make_etag(*parts), modified
+
+    def cached(self, handler, request, *args, **kwargs):
+        cache_state = self.get_response_etag(request)
+        if cache_state is None:
+            return handler(request, *args, **kwargs)
+        etag, modified = cache_state
+        response = get_conditional_response(
+            request, etag=quote_etag(etag), last_modified=modified)
+        if response is None:
+            response = get_response(etag)
+        if response is None:
+            response = handler(request, *args, **kwargs)
+            self.response_etag = etag
+        response['ETag'] = quote_etag(etag)
+        response['Last-Modified'] = http_date(modified)
+        patch_cache_control(response, public=True, no_cache=True)
+        patch_vary_headers(response, ('Accept', 'Authorization'))
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.cached(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached(super().retrieve, request, *args, **kwargs)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args,
+                                             **kwargs)
+        etag = getattr(self, 'response_etag', None)
+        if etag is not None and isinstance(response, Response):
+            response.add_post_render_callback(partial(set_response, etag))
+        return response
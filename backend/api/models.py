@@ -1,6 +1,9 @@
 from django.core import validators
 from django.db import models
+from django.db.models import F, Window
+from django.db.models.functions import RowNumber
 
+from api.storage import recipe_image_storage
 from users.models import User
 
 
@@ -53,6 +56,33 @@ class Tag(models.Model):
         return self.name
 
 
+class RecipeQuerySet(models.QuerySet):
+
+    def increment(self, pk, field, delta=1):
+        queryset = self.filter(pk=pk)
+        if delta < 0:
+            queryset = queryset.filter(**{f'{field}__gt': 0})
+        return queryset.update(**{field: F(field) + delta})
+
+    def latest_by_author(self, author_ids, limit=None):
+        if not author_ids:
+            return self.none()
+        queryset = self.filter(author_id__in=author_ids).order_by('-id')
+        if limit is None:
+            return queryset
+        ranked = queryset.order_by().annotate(author_rank=Window(
+            RowNumber(),
+            partition_by=[F('author_id')],
+            order_by=F('id').desc(),
+        ))
+        sql, params = ranked.query.sql_with_params()
+        return self.raw(
+            f'SELECT * FROM ({sql}) ranked '
+            f'WHERE ranked.author_rank <= %s ORDER BY ranked.id DESC',
+            (*params, limit),
+        )
+
+
 class Recipe(models.Model):
     author = models.ForeignKey(User, on_delete=models.CASCADE,
                                related_name='recipes',
@@ -60,7 +90,14 @@ class Recipe(models.Model):
     name = models.CharField(max_length=200,
                             verbose_name='Название рецепта')
     image = models.ImageField(upload_to='recipes/',
+                              storage=recipe_image_storage,
                               verbose_name='Картинка рецепта')
+    image_variant = models.CharField(
+        max_length=100,
+        blank=True,
+        editable=False,
+        verbose_name='Уменьшенные копии картинки',
+    )
     text = models.TextField(verbose_name='Описание рецепта')
     ingredients = models.ManyToManyField(
         Ingredient,
@@ -77,11 +114,27 @@ class Recipe(models.Model):
             validators.MinValueValidator(
                 1, message='Минимальное время приготовления 1 минута'),),
         verbose_name='Время приготовления')
+    favorites_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='В избранном',
+    )
+    cart_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='В списках покупок',
+    )
+
+    objects = RecipeQuerySet.as_manager()
 
     class Meta:
         ordering = ('-id',)
         verbose_name = 'Рецепт'
         verbose_name_plural = 'Рецепты'
+        indexes = [
+            models.Index(fields=('favorites_count', 'id'),
+                         name='recipe_popularity_idx'),
+        ]
 
 
 class IngredientAmount(models.Model):
@@ -110,6 +163,10 @@ class IngredientAmount(models.Model):
             models.UniqueConstraint(fields=('ingredient', 'recipe'),
                                     name='unique ingredients recipe')
         ]
+        indexes = [
+            models.Index(fields=('recipe', 'ingredient'),
+                         name='ingredientamount_recipe_idx'),
+        ]
 
 
 class Favorite(models.Model):
@@ -1,6 +1,106 @@
-from rest_framework.pagination import PageNumberPagination
+import hashlib
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+from rest_framework.response import Response
+
+COUNT_KEY = 'pagination:count:{}'
+
+
+def estimate_count(queryset):
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass',
+            [queryset.model._meta.db_table],
+        )
+        row = cursor.fetchone()
+    if row is None or row[0] < 0:
+        return None
+    return row[0]
+
+
+class CountedPaginator(Paginator):
+    def __init__(self, object_list, per_page, count, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self._count = count
+
+    @cached_property
+    def count(self):
+        return self._count
 
 
 class LimitPageNumberPagination(PageNumberPagination):
     page_size = 6
     page_size_query_param = 'limit'
+
+
+class EstimatedCountPagination(LimitPageNumberPagination):
+    uncached_query_params = ('is_favorited', 'is_in_shopping_cart')
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.count_is_exact, count = self.get_count(queryset, request)
+        self.django_paginator_class = (
+            lambda object_list, per_page: CountedPaginator(
+                object_list, per_page, count))
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_count(self, queryset, request):
+        queryset = queryset.values('pk')
+        if not queryset.query.where:
+            estimate = estimate_count(queryset)
+            if (estimate is not None
+                    and estimate >= settings.PAGINATION_ESTIMATE_THRESHOLD
+                    and not self.reaches_end(request, estimate)):
+                return False, estimate
+        if any(request.query_params.get(param)
+               for param in self.uncached_query_params):
+            return True, queryset.count()
+        sql, params = queryset.query.sql_with_params()
+        key = COUNT_KEY.format(
+            hashlib.sha256(f'{sql}|{params!r}'.encode()).hexdigest())
+        count = cache.get(key)
+        if count is not None:
+            return False, count
+        count = queryset.count()
+        cache.set(key, count, settings.PAGINATION_COUNT_CACHE_TIMEOUT)
+        return True, count
+
+    def reaches_end(self, request, count):
+        try:
+            page_number = int(request.query_params.get(
+                self.page_query_param, 1))
+        except ValueError:
+            return True
+        return page_number * self.get_page_size(request) >= count
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('count', self.page.paginator.count),
+            ('count_is_exact', self.count_is_exact),
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data)
+        ]))
+
+
+class LimitCursorPagination(CursorPagination):
+    page_size = 6
+    page_size_query_param = 'limit'
+    ordering = '-id'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if queryset.query.order_by and tuple(
+                queryset.query.order_by) != (self.ordering,):
+            raise ValidationError({
+                self.cursor_query_param:
+                'Курсорная пагинация не поддерживает другую сортировку'})
+        return super().paginate_queryset(queryset, request, view)
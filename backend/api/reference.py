@@ -0,0 +1,78 @@
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+
+from api.models import Ingredient, Tag
+
+VERSION_KEY = 'reference:version'
+REFERENCE_FIELDS = {
+    'ingredients': ('name', 'measurement_unit'),
+    'tags': ('name', 'color', 'slug'),
+}
+
+_reference = None
+
+
+class ReferenceData:
+    def __init__(self, version):
+        self.version = version
+        self.loaded_at = time.monotonic()
+        self.ingredients = {
+            pk: (name, measurement_unit)
+            for pk, name, measurement_unit in Ingredient.objects.values_list(
+                'id', 'name', 'measurement_unit')
+        }
+        self.tags = {
+            pk: (name, color, slug)
+            for pk, name, color, slug in Tag.objects.values_list(
+                'id', 'name', 'color', 'slug')
+        }
+        self.tag_slugs = {slug: pk for pk, (_, _, slug) in self.tags.items()}
+
+    def is_stale(self, version):
+        return (self.version != version
+                or time.monotonic() - self.loaded_at
+                > settings.REFERENCE_DATA_TIMEOUT)
+
+    def get_item(self, kind, pk):
+        return {'id': pk, **dict(zip(REFERENCE_FIELDS[kind],
+                                     getattr(self, kind)[pk]))}
+
+    def iter_items(self, kind):
+        for pk in getattr(self, kind):
+            yield self.get_item(kind, pk)
+
+
+def get_version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        version = uuid.uuid4().hex
+        if not cache.add(VERSION_KEY, version, timeout=None):
+            version = cache.get(VERSION_KEY, version)
+    return version
+
+
+def get_reference(context=None):
+    global _reference
+    if context is not None and 'reference' in context:
+        return context['reference']
+    version = get_version()
+    if _reference is None or _reference.is_stale(version):
+        _reference = ReferenceData(version)
+    if context is not None:
+        context['reference'] = _reference
+    return _reference
+
+
+def reload_reference(context=None):
+    global _reference
+    _reference = ReferenceData(get_version())
+    if context is not None:
+        context['reference'] = _reference
+    return _reference
+
+
+def invalidate_reference():
+    cache.set(VERSION_KEY, uuid.uuid4().hex, timeout=None)
@@ -0,0 +1,44 @@
+import hashlib
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+
+VERSION_KEY = 'response_cache:version:{}'
+RESPONSE_KEY = 'response_cache:response:{}'
+
+
+def get_version(scope):
+    key = VERSION_KEY.format(scope)
+    version = cache.get(key)
+    if version is None:
+        version = (uuid.uuid4().hex, int(time.time()))
+        cache.set(key, version, timeout=None)
+    return version
+
+
+def invalidate_responses(*scopes):
+    version = (uuid.uuid4().hex, int(time.time()))
+    cache.set_many({VERSION_KEY.format(scope): version for scope in scopes},
+                   timeout=None)
+
+
+def make_etag(*parts):
+    return hashlib.sha256('|'.join(parts).encode()).hexdigest()
+
+
+def get_response(etag):
+    cached = cache.get(RESPONSE_KEY.format(etag))
+    if cached is None:
+        return None
+    content, content_type = cached
+    return HttpResponse(content, content_type=content_type)
+
+
+def set_response(etag, response):
+    if response.status_code == 200:
+        cache.set(RESPONSE_KEY.format(etag),
+                  (response.content, response['Content-Type']),
+                  settings.RESPONSE_CACHE_TIMEOUT)
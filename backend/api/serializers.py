@@ -1,6 +1,13 @@
-from django.shortcuts import get_object_or_404
+import binascii
+from functools import partial
+
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import Manager
 from drf_extra_fields.fields import Base64ImageField
+from rest_framework.exceptions import NotFound
 from rest_framework.serializers import (
+    ListSerializer,
     ModelSerializer,
     ReadOnlyField,
     SerializerMethodField,
@@ -8,11 +15,57 @@ from rest_framework.serializers import (
 )
 from rest_framework.validators import UniqueTogetherValidator
 
+from api.fragments import get_fragments
+from api.images import (
+    VARIANTS,
+    ImageRejected,
+    get_image_name,
+    read_base64_image,
+    schedule_recipe_image
+)
 from api.models import Ingredient, IngredientAmount, Recipe, Tag
-from users.models import Follow
+from api.reference import get_reference, reload_reference
+from api.signals import recipe_ingredients_changed
+from api.user_state import get_user_state
+from users.models import Follow, UserStats
 from users.serializers import CustomUserSerializer
 
 
+class RecipeImageField(Base64ImageField):
+    def __init__(self, variant='full', **kwargs):
+        self.variant = variant
+        super().__init__(**kwargs)
+
+    def get_attribute(self, instance):
+        return instance
+
+    def to_internal_value(self, data):
+        if not isinstance(data, str) or not data:
+            raise ValidationError(self.INVALID_FILE_MESSAGE)
+        try:
+            return read_base64_image(data)
+        except ImageRejected as error:
+            raise ValidationError(str(error))
+        except (binascii.Error, OSError, SyntaxError, ValueError):
+            raise ValidationError(self.INVALID_FILE_MESSAGE)
+
+    def to_representation(self, recipe):
+        if not recipe.image:
+            return None
+        url = default_storage.url(get_image_name(recipe, self.variant))
+        request = self.context.get('request')
+        if request is None:
+            return url
+        return request.build_absolute_uri(url)
+
+
+def get_recipes_limit(request):
+    try:
+        return max(int(request.query_params['recipes_limit']), 0)
+    except (KeyError, ValueError):
+        return None
+
+
 class TagSerializer(ModelSerializer):
     class Meta:
         model = Tag
@@ -26,11 +79,9 @@ class IngredientSerializer(ModelSerializer):
 
 
 class IngredientAmountSerializer(ModelSerializer):
-    id = ReadOnlyField(source='ingredient.id')
-    name = ReadOnlyField(source='ingredient.name')
-    measurement_unit = ReadOnlyField(
-        source='ingredient.measurement_unit'
-    )
+    id = ReadOnlyField(source='ingredient_id')
+    name = SerializerMethodField()
+    measurement_unit = SerializerMethodField()
 
     class Meta:
         model = IngredientAmount
@@ -42,9 +93,29 @@ class IngredientAmountSerializer(ModelSerializer):
             )
         ]
 
+    def get_ingredient(self, obj):
+        reference = get_reference(self.context)
+        if obj.ingredient_id not in reference.ingredients:
+            reference = reload_reference(self.context)
+        return reference.ingredients[obj.ingredient_id]
+
+    def get_name(self, obj):
+        return self.get_ingredient(obj)[0]
+
+    def get_measurement_unit(self, obj):
+        return self.get_ingredient(obj)[1]
+
+
+class RecipeListSerializer(ListSerializer):
+    def to_representation(self, data):
+        recipes = list(data.all() if isinstance(data, Manager) else data)
+        fragments = get_fragments(recipes, self.child.build_fragment)
+        return [self.child.personalize(fragment) for fragment in fragments]
+
 
 class RecipeSerializer(ModelSerializer):
-    image = Base64ImageField()
+    image = RecipeImageField()
+    image_variants = SerializerMethodField()
     tags = TagSerializer(read_only=True, many=True)
     author = CustomUserSerializer(read_only=True)
     ingredients = IngredientAmountSerializer(
@@ -58,81 +129,150 @@ class RecipeSerializer(ModelSerializer):
     class Meta:
         model = Recipe
         fields = ('id', 'tags', 'author', 'ingredients', 'is_favorited',
-                  'is_in_shopping_cart', 'name', 'image', 'text',
-                  'cooking_time')
+                  'is_in_shopping_cart', 'name', 'image', 'image_variants',
+                  'text', 'cooking_time')
+        list_serializer_class = RecipeListSerializer
+
+    def to_representation(self, instance):
+        fragment, = get_fragments([instance], self.build_fragment)
+        return self.personalize(fragment)
+
+    def build_fragment(self, instance):
+        return super(RecipeSerializer, RecipeSerializer()).to_representation(
+            instance)
+
+    def personalize(self, fragment):
+        request = self.context.get('request')
+        state = get_user_state(request)
+        author = dict(fragment['author'])
+        author['is_subscribed'] = author['id'] in state.following
+        data = dict(fragment, author=author)
+        data['is_favorited'] = data['id'] in state.favorites
+        data['is_in_shopping_cart'] = data['id'] in state.cart
+        if request is not None and data['image']:
+            data['image'] = request.build_absolute_uri(data['image'])
+            data['image_variants'] = {
+                variant: request.build_absolute_uri(url)
+                for variant, url in data['image_variants'].items()}
+        return data
+
+    def get_image_variants(self, obj):
+        if not obj.image:
+            return {}
+        return {variant: default_storage.url(get_image_name(obj, variant))
+                for variant in VARIANTS}
 
     def get_is_favorited(self, obj):
-        user = self.context.get('request').user
-        return (
-            user.is_authenticated and Recipe.objects.filter(
-                favorites__user=user, id=obj.id
-            ).exists()
-        )
+        return obj.id in get_user_state(self.context.get('request')).favorites
 
     def get_is_in_shopping_cart(self, obj):
-        user = self.context.get('request').user
-        return (
-            user.is_authenticated and Recipe.objects.filter(
-                cart__user=user, id=obj.id
-            ).exists()
-        )
+        return obj.id in get_user_state(self.context.get('request')).cart
 
     def validate(self, data):
-        ingredients = self.initial_data.get('ingredients')
+        reference = get_reference(self.context)
+        data['ingredients'] = self.parse_ingredients(
+            self.initial_data.get('ingredients'))
+        data['tags'] = self.parse_tags(self.initial_data.get('tags'))
+        if (not data['ingredients'].keys() <= reference.ingredients.keys()
+                or not data['tags'] <= reference.tags.keys()):
+            reference = reload_reference(self.context)
+        if not data['ingredients'].keys() <= reference.ingredients.keys():
+            raise NotFound
+        if not data['tags'] <= reference.tags.keys():
+            raise ValidationError({'tags': 'Указан несуществующий тег'})
+        return data
+
+    def parse_ingredients(self, ingredients):
         if not ingredients:
             raise ValidationError({
                 'ingredients':
                 'Для рецепта необходим хотя бы один ингредиент'})
-        ingredient_list = []
+        amounts = {}
         for ingredient_item in ingredients:
-            ingredient = get_object_or_404(Ingredient,
-                                           id=ingredient_item['id'])
-            if ingredient in ingredient_list:
+            try:
+                ingredient_id = int(ingredient_item['id'])
+                amount = int(ingredient_item['amount'])
+            except (KeyError, TypeError, ValueError):
+                raise ValidationError({
+                    'ingredients': 'Некорректные данные ингредиента'})
+            if ingredient_id in amounts:
                 raise ValidationError('Ингридиенты должны быть уникальными')
-            ingredient_list.append(ingredient)
-            if int(ingredient_item['amount']) < 0:
+            if amount < 1:
                 raise ValidationError({
                     'ingredients':
                     'Значение количества ингредиента должно больше 0'
                 })
-        data['ingredients'] = ingredients
-        return data
+            amounts[ingredient_id] = amount
+        return amounts
+
+    def parse_tags(self, tags):
+        if not tags:
+            raise ValidationError({
+                'tags': 'Для рецепта необходим хотя бы один тег'})
+        try:
+            return {int(tag) for tag in tags}
+        except (TypeError, ValueError):
+            raise ValidationError({'tags': 'Некорректный идентификатор тега'})
 
     def create_ingredients(self, ingredients, recipe):
-        for ingredient in ingredients:
-            IngredientAmount.objects.create(
-                recipe=recipe,
-                ingredient_id=ingredient.get('id'),
-                amount=ingredient.get('amount'),
-            )
+        IngredientAmount.objects.bulk_create(
+            IngredientAmount(recipe=recipe, ingredient_id=ingredient_id,
+                             amount=amount)
+            for ingredient_id, amount in ingredients.items()
+        )
 
+    def update_ingredients(self, ingredients, recipe):
+        current = {item.ingredient_id: item
+                   for item in recipe.ingredientamount_set.all()}
+        created, updated = {}, []
+        for ingredient_id, amount in ingredients.items():
+            item = current.pop(ingredient_id, None)
+            if item is None:
+                created[ingredient_id] = amount
+            elif item.amount != amount:
+                item.amount = amount
+                updated.append(item)
+        if current:
+            IngredientAmount.objects.filter(
+                id__in=[item.id for item in current.values()]).delete()
+        IngredientAmount.objects.bulk_update(updated, ('amount',))
+        self.create_ingredients(created, recipe)
+        return bool(current or created or updated)
+
+    @transaction.atomic
     def create(self, validated_data):
-        image = validated_data.pop('image')
-        ingredients_data = validated_data.pop('ingredients')
-        recipe = Recipe.objects.create(image=image, **validated_data)
-        tags_data = self.initial_data.get('tags')
-        recipe.tags.set(tags_data)
-        self.create_ingredients(ingredients_data, recipe)
+        ingredients = validated_data.pop('ingredients')
+        tags = validated_data.pop('tags')
+        recipe = Recipe.objects.create(**validated_data)
+        recipe.tags.set(tags)
+        self.create_ingredients(ingredients, recipe)
+        recipe_ingredients_changed.send(sender=Recipe, instance=recipe)
+        self.schedule_image(recipe)
         return recipe
 
+    @transaction.atomic
     def update(self, instance, validated_data):
-        instance.image = validated_data.get('image', instance.image)
-        instance.name = validated_data.get('name', instance.name)
-        instance.text = validated_data.get('text', instance.text)
-        instance.cooking_time = validated_data.get(
-            'cooking_time', instance.cooking_time
-        )
-        instance.tags.clear()
-        tags_data = self.initial_data.get('tags')
-        instance.tags.set(tags_data)
-        IngredientAmount.objects.filter(recipe=instance).all().delete()
-        self.create_ingredients(validated_data.get('ingredients'), instance)
+        ingredients = validated_data.pop('ingredients')
+        tags = validated_data.pop('tags')
+        for field, value in validated_data.items():
+            setattr(instance, field, value)
+        if 'image' in validated_data:
+            instance.image_variant = ''
         instance.save()
+        instance.tags.set(tags)
+        if self.update_ingredients(ingredients, instance):
+            recipe_ingredients_changed.send(sender=Recipe, instance=instance)
+        if 'image' in validated_data:
+            self.schedule_image(instance)
         return instance
 
+    def schedule_image(self, recipe):
+        transaction.on_commit(
+            partial(schedule_recipe_image, recipe.id, recipe.image.name))
+
 
 class CropRecipeSerializer(ModelSerializer):
-    image = Base64ImageField()
+    image = RecipeImageField(variant='thumb')
 
     class Meta:
         model = Recipe
@@ -156,17 +296,22 @@ class FollowSerializer(ModelSerializer):
                   'is_subscribed', 'recipes', 'recipes_count')
 
     def get_is_subscribed(self, obj):
-        return Follow.objects.filter(
-            user=obj.user, author=obj.author
-        ).exists()
+        return True
 
     def get_recipes(self, obj):
-        request = self.context.get('request')
-        limit = request.GET.get('recipes_limit')
-        queryset = Recipe.objects.filter(author=obj.author)
-        if limit:
-            queryset = queryset[:int(limit)]
-        return CropRecipeSerializer(queryset, many=True).data
+        if hasattr(obj, 'recipe_previews'):
+            recipes = obj.recipe_previews
+        else:
+            recipes = Recipe.objects.filter(author=obj.author)
+            limit = get_recipes_limit(self.context.get('request'))
+            if limit is not None:
+                recipes = recipes[:limit]
+        return CropRecipeSerializer(recipes, many=True).data
 
     def get_recipes_count(self, obj):
-        return Recipe.objects.filter(author=obj.author).count()
+        if hasattr(obj, 'recipes_count'):
+            return obj.recipes_count
+        try:
+            return obj.author.stats.recipes_count
+        except UserStats.DoesNotExist:
+            return 0
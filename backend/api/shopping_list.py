@@ -0,0 +1,202 @@
+import csv
+import hashlib
+import io
+import multiprocessing
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Sum
+from reportlab.lib.pagesizes import A4
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.pdfgen import canvas
+
+from api.models import Cart, IngredientAmount
+
+FORMATS = ('pdf', 'csv', 'txt')
+CONTENT_TYPES = {
+    'pdf': 'application/pdf',
+    'csv': 'text/csv; charset=utf-8',
+    'txt': 'text/plain; charset=utf-8',
+}
+TITLE = 'Список ингредиентов'
+CSV_HEADER = ('Ингредиент', 'Количество', 'Единица измерения')
+
+FONT_NAME = 'segoeui'
+FONT_FILE = 'segoeui.ttf'
+HEADER_FORM = 'header'
+TITLE_FONT_SIZE = 24
+FONT_SIZE = 16
+LEFT_MARGIN = 75
+TITLE_TOP = 800
+TOP = 750
+BOTTOM = 50
+LINE_HEIGHT = 25
+
+CATALOGUE_VERSION_KEY = 'shopping_list:catalogue'
+USER_VERSION_KEY = 'shopping_list:user:{}'
+RECIPE_VERSION_KEY = 'shopping_list:recipe:{}'
+DOCUMENT_KEY = 'shopping_list:document:{}'
+
+
+def get_shopping_list(user):
+    return IngredientAmount.objects.filter(
+        recipe__cart__user=user
+    ).values_list(
+        'ingredient__name', 'ingredient__measurement_unit'
+    ).annotate(
+        total=Sum('amount')
+    ).order_by(
+        'ingredient__name', 'ingredient__measurement_unit'
+    )
+
+
+def format_line(number, name, measurement_unit, amount):
+    return f'{number}. {name} - {amount}, {measurement_unit}'
+
+
+class PageTemplate:
+    def __init__(self, font_path):
+        pdfmetrics.registerFont(TTFont(FONT_NAME, font_path, 'UTF-8'))
+        page_width = A4[0]
+        title_width = pdfmetrics.stringWidth(TITLE, FONT_NAME,
+                                             TITLE_FONT_SIZE)
+        self.title_x = (page_width - title_width) / 2
+        self.rows = tuple(range(TOP, BOTTOM - 1, -LINE_HEIGHT))
+
+    def draw_header(self, page):
+        page.beginForm(HEADER_FORM)
+        page.setFont(FONT_NAME, size=TITLE_FONT_SIZE)
+        page.drawString(self.title_x, TITLE_TOP, TITLE)
+        page.endForm()
+
+    def start_page(self, page):
+        page.doForm(HEADER_FORM)
+        page.setFont(FONT_NAME, size=FONT_SIZE)
+
+
+template = None
+_render_pool = None
+
+
+def load_template(font_path):
+    global template
+    template = PageTemplate(font_path)
+    return template
+
+
+def render_pdf(items):
+    buffer = io.BytesIO()
+    page = canvas.Canvas(buffer, pagesize=A4)
+    template.draw_header(page)
+    template.start_page(page)
+    rows_per_page = len(template.rows)
+    for number, item in enumerate(items, 1):
+        row = (number - 1) % rows_per_page
+        if row == 0 and number > 1:
+            page.showPage()
+            template.start_page(page)
+        page.drawString(LEFT_MARGIN, template.rows[row],
+                        format_line(number, *item))
+    page.showPage()
+    page.save()
+    buffer.seek(0)
+    return buffer
+
+
+def render_pdf_content(items):
+    return render_pdf(items).getvalue()
+
+
+def get_render_pool():
+    global _render_pool
+    if _render_pool is None:
+        _render_pool = ProcessPoolExecutor(
+            settings.PDF_RENDER_WORKERS,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=django.setup)
+    return _render_pool
+
+
+def build_pdf(user):
+    items = get_shopping_list(user)
+    if not settings.PDF_RENDER_WORKERS:
+        return render_pdf_content(items.iterator())
+    return get_render_pool().submit(render_pdf_content, list(items)).result()
+
+
+class Echo:
+    def write(self, value):
+        return value
+
+
+def iter_csv(items):
+    writer = csv.writer(Echo())
+    yield writer.writerow(CSV_HEADER)
+    for name, measurement_unit, amount in items.iterator():
+        yield writer.writerow((name, amount, measurement_unit))
+
+
+def iter_txt(items):
+    yield f'{TITLE}\n\n'
+    for number, item in enumerate(items.iterator(), 1):
+        yield format_line(number, *item) + '\n'
+
+
+def get_versions(keys):
+    versions = cache.get_many(keys)
+    missing = {key: uuid.uuid4().hex for key in keys if key not in versions}
+    if missing:
+        cache.set_many(missing, timeout=None)
+        versions.update(missing)
+    return [versions[key] for key in keys]
+
+
+def invalidate(key):
+    cache.set(key, uuid.uuid4().hex, timeout=None)
+
+
+def invalidate_user(user_id):
+    invalidate(USER_VERSION_KEY.format(user_id))
+
+
+def invalidate_recipe(recipe_id):
+    invalidate(RECIPE_VERSION_KEY.format(recipe_id))
+
+
+def invalidate_catalogue():
+    invalidate(CATALOGUE_VERSION_KEY)
+
+
+def get_etag(user, file_format):
+    recipe_ids = Cart.objects.filter(user_id=user.pk).order_by(
+        'recipe_id').values_list('recipe_id', flat=True)
+    keys = [CATALOGUE_VERSION_KEY, USER_VERSION_KEY.format(user.pk)]
+    keys.extend(RECIPE_VERSION_KEY.format(pk) for pk in recipe_ids)
+    state = '|'.join([file_format, *keys, *get_versions(keys)])
+    return hashlib.sha256(state.encode()).hexdigest()
+
+
+def get_document(etag):
+    return cache.get(DOCUMENT_KEY.format(etag))
+
+
+def set_document(etag, content):
+    cache.set(DOCUMENT_KEY.format(etag), content,
+              settings.SHOPPING_LIST_CACHE_TIMEOUT)
+
+
+def iter_and_cache(etag, lines):
+    if etag is None:
+        for line in lines:
+            yield line.encode()
+        return
+    chunks = []
+    for line in lines:
+        chunk = line.encode()
+        chunks.append(chunk)
+        yield chunk
+    set_document(etag, b''.join(chunks))
@@ -0,0 +1,150 @@
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import Signal, receiver
+
+from api.fragments import invalidate_fragments
+from api.models import (
+    Cart,
+    Favorite,
+    Ingredient,
+    IngredientAmount,
+    Recipe,
+    Tag
+)
+from api.reference import invalidate_reference
+from api.response_cache import invalidate_responses
+from api.shopping_list import (
+    invalidate_catalogue,
+    invalidate_recipe,
+    invalidate_user
+)
+from api.user_state import invalidate_user_state
+from users.models import Follow, User, UserStats
+
+recipe_ingredients_changed = Signal()
+
+RECIPE_COUNTERS = {
+    Favorite: 'favorites_count',
+    Cart: 'cart_count',
+}
+
+
+@receiver([post_save, post_delete], sender=Cart)
+def invalidate_cart_shopping_list(sender, instance, **kwargs):
+    transaction.on_commit(partial(invalidate_user, instance.user_id))
+
+
+@receiver([post_save, post_delete], sender=IngredientAmount)
+def invalidate_recipe_shopping_list(sender, instance, **kwargs):
+    transaction.on_commit(partial(invalidate_recipe, instance.recipe_id))
+
+
+@receiver(recipe_ingredients_changed, sender=Recipe)
+def invalidate_changed_recipe_shopping_list(sender, instance, **kwargs):
+    transaction.on_commit(partial(invalidate_recipe, instance.id))
+
+
+@receiver([post_save, post_delete], sender=Ingredient)
+def invalidate_ingredient_shopping_list(sender, instance, **kwargs):
+    transaction.on_commit(invalidate_catalogue)
+
+
+@receiver([post_save, post_delete], sender=Ingredient)
+@receiver([post_save, post_delete], sender=Tag)
+def invalidate_reference_data(sender, instance, **kwargs):
+    invalidate_reference()
+
+
+@receiver(post_save, sender=Favorite)
+@receiver(post_save, sender=Cart)
+def increment_recipe_counter(sender, instance, created, **kwargs):
+    if created:
+        Recipe.objects.increment(instance.recipe_id, RECIPE_COUNTERS[sender])
+
+
+@receiver(post_delete, sender=Favorite)
+@receiver(post_delete, sender=Cart)
+def decrement_recipe_counter(sender, instance, **kwargs):
+    Recipe.objects.increment(instance.recipe_id, RECIPE_COUNTERS[sender], -1)
+
+
+@receiver(post_save, sender=Recipe)
+def increment_recipes_count(sender, instance, created, **kwargs):
+    if created:
+        UserStats.objects.increment(instance.author_id, 'recipes_count')
+
+
+@receiver(post_delete, sender=Recipe)
+def decrement_recipes_count(sender, instance, **kwargs):
+    UserStats.objects.increment(instance.author_id, 'recipes_count', -1)
+
+
+@receiver([post_save, post_delete], sender=Favorite)
+@receiver([post_save, post_delete], sender=Cart)
+@receiver([post_save, post_delete], sender=Follow)
+def invalidate_personal_state(sender, instance, **kwargs):
+    transaction.on_commit(partial(invalidate_user_state, instance.user_id))
+
+
+def invalidate_responses_on_commit(*scopes):
+    transaction.on_commit(lambda: invalidate_responses(*scopes))
+
+
+@receiver([post_save, post_delete], sender=Recipe)
+@receiver([post_save, post_delete], sender=IngredientAmount)
+@receiver([post_save, post_delete], sender=Favorite)
+@receiver(m2m_changed, sender=Recipe.tags.through)
+@receiver(recipe_ingredients_changed, sender=Recipe)
+def invalidate_recipe_responses(sender, **kwargs):
+    invalidate_responses_on_commit('recipes')
+
+
+@receiver([post_save, post_delete], sender=Tag)
+def invalidate_tag_responses(sender, **kwargs):
+    invalidate_responses_on_commit('tags', 'recipes')
+
+
+@receiver([post_save, post_delete], sender=Ingredient)
+def invalidate_ingredient_responses(sender, **kwargs):
+    invalidate_responses_on_commit('ingredients', 'recipes')
+
+
+@receiver([post_save, post_delete], sender=User)
+def invalidate_author_responses(sender, update_fields=None, **kwargs):
+    if update_fields is None or set(update_fields) != {'last_login'}:
+        invalidate_responses_on_commit('recipes')
+
+
+def invalidate_fragments_on_commit(recipe_ids):
+    transaction.on_commit(lambda: invalidate_fragments(recipe_ids))
+
+
+@receiver([post_save, post_delete], sender=Recipe)
+@receiver(recipe_ingredients_changed, sender=Recipe)
+def invalidate_recipe_fragment(sender, instance, **kwargs):
+    invalidate_fragments_on_commit([instance.id])
+
+
+@receiver([post_save, post_delete], sender=IngredientAmount)
+def invalidate_ingredient_amount_fragment(sender, instance, **kwargs):
+    invalidate_fragments_on_commit([instance.recipe_id])
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+def invalidate_recipe_tags_fragment(sender, instance, reverse, pk_set,
+                                    **kwargs):
+    if not reverse:
+        invalidate_fragments_on_commit([instance.id])
+    elif pk_set:
+        invalidate_fragments_on_commit(list(pk_set))
+
+
+@receiver(post_save, sender=User)
+def invalidate_author_fragments(sender, instance, update_fields=None,
+                                **kwargs):
+    if update_fields is None or set(update_fields) != {'last_login'}:
+        invalidate_fragments_on_commit(list(
+            Recipe.objects.filter(author=instance).values_list(
+                'id', flat=True)))
@@ -0,0 +1,40 @@
+import hashlib
+import os
+
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    def get_hashed_name(self, name, content):
+        digest = hashlib.sha256()
+        for chunk in content.chunks():
+            digest.update(chunk)
+        content.seek(0)
+        directory = os.path.dirname(name)
+        extension = os.path.splitext(name)[1].lower()
+        hexdigest = digest.hexdigest()
+        return os.path.join(directory, hexdigest[:2], hexdigest + extension)
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+        name = self.get_hashed_name(name, content)
+        if self.exists(name):
+            os.utime(self.path(name))
+            return name
+        return super().save(name, content, max_length)
+
+    def iter_files(self, path=''):
+        directories, files = self.listdir(path)
+        for file in files:
+            yield os.path.join(path, file)
+        for directory in directories:
+            yield from self.iter_files(os.path.join(path, directory))
+
+
+recipe_image_storage = ContentAddressedStorage()
@@ -0,0 +1,229 @@
+import base64
+import io
+import os
+import struct
+import unittest
+import zlib
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import (
+    SimpleTestCase,
+    TestCase,
+    TransactionTestCase,
+    override_settings
+)
+from PIL import Image
+from rest_framework.exceptions import ValidationError
+from rest_framework.test import APIClient
+
+from api.filters import AuthorAndTagFilter
+from api.fragments import get_fragments, invalidate_fragments
+from api.metrics import PROCESS_KEY, PROCESSES_KEY, collect, new_endpoint
+from api.models import (
+    Cart,
+    Favorite,
+    Ingredient,
+    IngredientAmount,
+    Recipe,
+    Tag
+)
+from api.serializers import RecipeImageField
+from users.models import User
+
+RECIPES_URL = '/api/recipes/'
+SHOPPING_LIST_URL = '/api/recipes/download_shopping_cart/?format=txt'
+
+
+def png_chunk(kind, body):
+    return (struct.pack('>I', len(body)) + kind + body
+            + struct.pack('>I', zlib.crc32(kind + body)))
+
+
+@override_settings(CACHE_SHARED=True)
+class RecipeFilterTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username='reader', email='reader@example.com')
+        cls.author = User.objects.create_user(
+            username='author', email='author@example.com')
+        cls.breakfast = Tag.objects.create(name='Завтрак', color=Tag.ORANGE,
+                                           slug='breakfast')
+        cls.dinner = Tag.objects.create(name='Ужин', color=Tag.PURPLE,
+                                        slug='dinner')
+        for number in range(6):
+            recipe = Recipe.objects.create(
+                author=cls.author if number % 2 else cls.user,
+                name=f'Рецепт {number}', text='', image='recipes/test.png',
+                cooking_time=1)
+            recipe.tags.set([cls.breakfast, cls.dinner][:number % 3])
+            if number < 4:
+                Favorite.objects.create(user=cls.user, recipe=recipe)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def get_filtered(self):
+        return self.client.get(
+            f'{RECIPES_URL}?tags=breakfast&tags=dinner'
+            f'&author={self.author.id}&is_favorited=1')
+
+    def test_filtered_list_queries(self):
+        self.get_filtered()
+        with self.assertNumQueries(3):
+            response = self.get_filtered()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([recipe['name'] for recipe in response.json()[
+            'results']], ['Рецепт 1'])
+
+    def test_tags_are_not_duplicated(self):
+        response = self.client.get(
+            f'{RECIPES_URL}?tags=breakfast&tags=dinner')
+        ids = [recipe['id'] for recipe in response.json()['results']]
+        self.assertEqual(len(ids), len(set(ids)))
+        self.assertEqual(response.json()['count'], 4)
+
+    def test_cursor_with_ordering(self):
+        response = self.client.get(f'{RECIPES_URL}?cursor=&limit=2')
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNotNone(response.json()['next'])
+        response = self.client.get(
+            f'{RECIPES_URL}?ordering=popular&cursor=&limit=2')
+        self.assertEqual(response.status_code, 400)
+
+    @override_settings(PAGINATION_ESTIMATE_THRESHOLD=1)
+    @mock.patch('api.pagination.estimate_count', return_value=3)
+    def test_underestimated_count(self, estimate_count):
+        response = self.client.get(f'{RECIPES_URL}?page=2&limit=2')
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNotNone(response.json()['next'])
+        response = self.client.get(f'{RECIPES_URL}?page=3&limit=2')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['results']), 2)
+        estimate_count.assert_called()
+
+    @unittest.skipUnless(connection.vendor == 'postgresql',
+                         'план запроса проверяется только в PostgreSQL')
+    def test_tag_filter_uses_index(self):
+        queryset = AuthorAndTagFilter(
+            {'tags': ['breakfast']}, queryset=Recipe.objects.all()).qs
+        with connection.cursor() as cursor:
+            cursor.execute('SET LOCAL enable_seqscan = off')
+        self.assertIn('recipe_tags_tag_recipe_idx', queryset.explain())
+
+
+@override_settings(CACHE_SHARED=True)
+class RecipeFragmentTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.recipe = Recipe.objects.create(
+            author=User.objects.create_user(
+                username='chef', email='chef@example.com'),
+            name='Суп', text='', image='recipes/test.png', cooking_time=1)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_refill_after_invalidation(self):
+        def build_during_update(recipe):
+            invalidate_fragments([recipe.id])
+            return {'name': 'Старый суп'}
+        get_fragments([self.recipe], build_during_update)
+        self.assertEqual(
+            get_fragments([self.recipe], lambda recipe: {'name': 'Суп'}),
+            [{'name': 'Суп'}])
+
+
+class RecipeImageFieldTests(SimpleTestCase):
+    def setUp(self):
+        self.field = RecipeImageField()
+
+    def encode(self, content, line_length=None):
+        data = base64.b64encode(content).decode()
+        if line_length:
+            data = '\r\n'.join(
+                data[offset:offset + line_length]
+                for offset in range(0, len(data), line_length))
+        return 'data:image/png;base64,' + data
+
+    def test_line_wrapped_payload(self):
+        buffer = io.BytesIO()
+        Image.frombytes('RGB', (200, 200), os.urandom(200 * 200 * 3)).save(
+            buffer, 'PNG')
+        for line_length in (None, 64, 76):
+            image = self.field.to_internal_value(
+                self.encode(buffer.getvalue(), line_length))
+            self.assertEqual(image.read(), buffer.getvalue())
+
+    def test_decompression_bomb(self):
+        header = struct.pack('>IIBBBBB', 100000, 100000, 8, 2, 0, 0, 0)
+        content = (b'\x89PNG\r\n\x1a\n' + png_chunk(b'IHDR', header)
+                   + png_chunk(b'IDAT', zlib.compress(bytes(1000)))
+                   + png_chunk(b'IEND', b''))
+        with self.assertRaises(ValidationError):
+            self.field.to_internal_value(self.encode(content))
+
+    @override_settings(IMAGE_MAX_BYTES=100 * 1024)
+    def test_oversize_header_rejected_early(self):
+        header = struct.pack('>IIBBBBB', 9000, 10, 8, 2, 0, 0, 0)
+        content = (b'\x89PNG\r\n\x1a\n' + png_chunk(b'IHDR', header)
+                   + png_chunk(b'IDAT', os.urandom(200 * 1024)))
+        with self.assertRaisesMessage(ValidationError, 'пикселей'):
+            self.field.to_internal_value(self.encode(content))
+
+
+class MetricsTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_collect_prunes_expired_processes(self):
+        cache.set(PROCESSES_KEY, {1, 2})
+        cache.set(PROCESS_KEY.format(1), {
+            'RecipeViewSet.list': dict(new_endpoint(), count=3)})
+        self.assertEqual(collect()['RecipeViewSet.list']['count'], 3)
+        self.assertEqual(cache.get(PROCESSES_KEY), {1})
+
+
+@override_settings(CACHE_SHARED=True)
+class ShoppingListTests(TransactionTestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='cook', email='cook@example.com')
+        self.tag = Tag.objects.create(name='Обед', color=Tag.GREEN,
+                                      slug='lunch')
+        self.ingredient = Ingredient.objects.create(
+            name='Мука', measurement_unit='г')
+        self.recipe = Recipe.objects.create(
+            author=self.user, name='Блины', text='', cooking_time=1,
+            image='recipes/test.png')
+        self.recipe.tags.set([self.tag])
+        IngredientAmount.objects.create(
+            recipe=self.recipe, ingredient=self.ingredient, amount=100)
+        Cart.objects.create(user=self.user, recipe=self.recipe)
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def download(self):
+        response = self.client.get(SHOPPING_LIST_URL)
+        self.assertEqual(response.status_code, 200)
+        return b''.join(response.streaming_content).decode()
+
+    def test_recipe_update_changes_list(self):
+        self.assertIn('Мука - 100, г', self.download())
+        response = self.client.patch(
+            f'{RECIPES_URL}{self.recipe.id}/', {
+                'name': 'Блины', 'text': 'Тесто', 'cooking_time': 1,
+                'tags': [self.tag.id],
+                'ingredients': [{'id': self.ingredient.id, 'amount': 250}],
+            }, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('Мука - 250, г', self.download())
+
+    @override_settings(ASGI_MODE=True)
+    def test_asgi_mode_returns_whole_list(self):
+        response = self.client.get(SHOPPING_LIST_URL)
+        self.assertFalse(response.streaming)
+        self.assertIn('Мука - 100, г', response.content.decode())
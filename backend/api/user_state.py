@@ -0,0 +1,66 @@
+from array import array
+
+from django.conf import settings
+from django.core.cache import cache
+
+from api.models import Cart, Favorite
+from users.models import Follow
+
+USER_STATE_KEY = 'user_state:{}'
+
+
+def to_array(values):
+    return array('L', sorted(values))
+
+
+class UserState:
+    def __init__(self, favorites=(), cart=(), following=()):
+        self.favorites = frozenset(favorites)
+        self.cart = frozenset(cart)
+        self.following = frozenset(following)
+
+    def __getstate__(self):
+        return (to_array(self.favorites), to_array(self.cart),
+                to_array(self.following))
+
+    def __setstate__(self, state):
+        self.__init__(*state)
+
+    @classmethod
+    def load(cls, user):
+        return cls(
+            Favorite.objects.filter(user=user).values_list(
+                'recipe_id', flat=True),
+            Cart.objects.filter(user=user).values_list(
+                'recipe_id', flat=True),
+            Follow.objects.filter(user=user).values_list(
+                'author_id', flat=True),
+        )
+
+
+ANONYMOUS_STATE = UserState()
+
+
+def get_user_state(request):
+    if request is None or request.user.is_anonymous:
+        return ANONYMOUS_STATE
+    state = getattr(request, '_user_state', None)
+    if state is None:
+        state = load_user_state(request.user)
+        request._user_state = state
+    return state
+
+
+def load_user_state(user):
+    if not settings.CACHE_SHARED:
+        return UserState.load(user)
+    key = USER_STATE_KEY.format(user.pk)
+    state = cache.get(key)
+    if state is None:
+        state = UserState.load(user)
+        cache.set(key, state, settings.USER_STATE_CACHE_TIMEOUT)
+    return state
+
+
+def invalidate_user_state(user_id):
+    cache.delete(USER_STATE_KEY.format(user_id))
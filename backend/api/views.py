@@ -1,24 +1,26 @@
-from django.http import HttpResponse
+from django.conf import settings
+from django.http import HttpResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
-from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.ttfonts import TTFont
-from reportlab.pdfgen import canvas
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import quote_etag
 from rest_framework import status, viewsets
 from rest_framework.decorators import action
+from rest_framework.parsers import FormParser, MultiPartParser
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.viewsets import ReadOnlyModelViewSet
 
-from api.pagination import LimitPageNumberPagination
-from api.filters import AuthorAndTagFilter, IngredientSearchFilter
-from api.models import (
-    Cart,
-    Favorite,
-    Ingredient,
-    IngredientAmount,
-    Recipe,
-    Tag
+from api.autocomplete import search_ingredients
+from api.filters import AuthorAndTagFilter
+from api.mixins import (
+    AnonymousCacheMixin,
+    CursorPaginationMixin,
+    ReferenceDataMixin
 )
+from api.models import Cart, Favorite, Ingredient, Recipe, Tag
+from api.negotiation import IgnoreFormatContentNegotiation
+from api.pagination import EstimatedCountPagination
+from api.parsers import LimitedJSONParser
 from api.permissions import IsAdminOrReadOnly, IsOwnerOrReadOnly
 from api.serializers import (
     CropRecipeSerializer,
@@ -26,28 +28,70 @@ from api.serializers import (
     RecipeSerializer,
     TagSerializer
 )
+from api.shopping_list import (
+    CONTENT_TYPES,
+    FORMATS,
+    build_pdf,
+    get_document,
+    get_etag,
+    get_shopping_list,
+    iter_and_cache,
+    iter_csv,
+    iter_txt,
+    set_document
+)
 
 
-class TagsViewSet(ReadOnlyModelViewSet):
+class TagsViewSet(AnonymousCacheMixin, ReferenceDataMixin,
+                  ReadOnlyModelViewSet):
     permission_classes = (IsAdminOrReadOnly,)
+    cache_scope = 'tags'
+    reference_kind = 'tags'
     queryset = Tag.objects.all()
     serializer_class = TagSerializer
 
 
-class IngredientsViewSet(ReadOnlyModelViewSet):
+class IngredientsViewSet(AnonymousCacheMixin, ReferenceDataMixin,
+                         ReadOnlyModelViewSet):
     permission_classes = (IsAdminOrReadOnly,)
+    cache_scope = 'ingredients'
+    cache_query_params = ('name',)
+    reference_kind = 'ingredients'
     queryset = Ingredient.objects.all()
     serializer_class = IngredientSerializer
-    filter_backends = (IngredientSearchFilter,)
-    search_fields = ('^name',)
 
+    def filter_items(self, ingredients):
+        name = self.request.query_params.get('name', '').strip().lower()
+        if not name:
+            return ingredients
+        return (ingredient for ingredient in ingredients
+                if ingredient['name'].lower().startswith(name))
+
+    @action(detail=False)
+    def autocomplete(self, request):
+        query = request.query_params.get('name', '').strip()
+        if not query:
+            return Response([])
+        try:
+            limit = int(request.query_params.get('limit'))
+        except (TypeError, ValueError):
+            limit = settings.INGREDIENT_AUTOCOMPLETE_LIMIT
+        ingredients = search_ingredients(query, max(limit, 1))
+        serializer = self.get_serializer(ingredients, many=True)
+        return Response(serializer.data)
 
-class RecipeViewSet(viewsets.ModelViewSet):
+
+class RecipeViewSet(AnonymousCacheMixin, CursorPaginationMixin,
+                    viewsets.ModelViewSet):
     queryset = Recipe.objects.all()
     serializer_class = RecipeSerializer
-    pagination_class = LimitPageNumberPagination
+    pagination_class = EstimatedCountPagination
     filter_class = AuthorAndTagFilter
     permission_classes = [IsOwnerOrReadOnly]
+    parser_classes = (LimitedJSONParser, FormParser, MultiPartParser)
+    cache_scope = 'recipes'
+    cache_query_params = ('tags', 'author', 'ordering', 'page', 'limit',
+                          'cursor')
 
     def perform_create(self, serializer):
         serializer.save(author=self.request.user)
@@ -71,38 +115,48 @@ class RecipeViewSet(viewsets.ModelViewSet):
         return None
 
     @action(detail=False, methods=['get'],
-            permission_classes=[IsAuthenticated])
+            permission_classes=[IsAuthenticated],
+            content_negotiation_class=IgnoreFormatContentNegotiation)
     def download_shopping_cart(self, request):
-        final_list = {}
-        ingredients = IngredientAmount.objects.filter(
-            recipe__cart__user=request.user).values_list(
-            'ingredient__name', 'ingredient__measurement_unit',
-            'amount')
-        for item in ingredients:
-            name = item[0]
-            if name not in final_list:
-                final_list[name] = {
-                    'measurement_unit': item[1],
-                    'amount': item[2]
-                }
+        file_format = request.query_params.get('format', 'pdf')
+        if file_format not in FORMATS:
+            return Response({
+                'errors': 'Неподдерживаемый формат списка покупок'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        if not settings.CACHE_SHARED:
+            response = self.get_shopping_list_response(None, file_format)
+            patch_cache_control(response, private=True, no_store=True)
+            return response
+        etag = get_etag(request.user, file_format)
+        response = get_conditional_response(request, etag=quote_etag(etag))
+        if response is None:
+            response = self.get_shopping_list_response(etag, file_format)
+        response['ETag'] = quote_etag(etag)
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+    def get_shopping_list_response(self, etag, file_format):
+        content_type = CONTENT_TYPES[file_format]
+        content = get_document(etag) if etag is not None else None
+        if content is not None:
+            response = HttpResponse(content, content_type=content_type)
+        elif file_format == 'pdf':
+            content = build_pdf(self.request.user)
+            if etag is not None:
+                set_document(etag, content)
+            response = HttpResponse(content, content_type=content_type)
+        else:
+            lines = iter_and_cache(etag, (
+                iter_csv if file_format == 'csv' else iter_txt)(
+                    get_shopping_list(self.request.user)))
+            if settings.ASGI_MODE:
+                response = HttpResponse(b''.join(lines),
+                                        content_type=content_type)
             else:
-                final_list[name]['amount'] += item[2]
-        pdfmetrics.registerFont(
-            TTFont('segoeui', 'segoeui.ttf', 'UTF-8'))
-        response = HttpResponse(content_type='application/pdf')
-        response['Content-Disposition'] = ('attachment; '
-                                           'filename="shopping_list.pdf"')
-        page = canvas.Canvas(response)
-        page.setFont('segoeui', size=24)
-        page.drawString(200, 800, 'Список ингредиентов')
-        page.setFont('segoeui', size=16)
-        height = 750
-        for i, (name, data) in enumerate(final_list.items(), 1):
-            page.drawString(75, height, (f'{i}. {name} - {data["amount"]}, '
-                                         f'{data["measurement_unit"]}'))
-            height -= 25
-        page.showPage()
-        page.save()
+                response = StreamingHttpResponse(lines,
+                                                 content_type=content_type)
+        response['Content-Disposition'] = (
+            f'attachment; filename="shopping_list.{file_format}"')
         return response
 
     def add_obj(self, model, user, pk):
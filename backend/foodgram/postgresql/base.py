@@ -0,0 +1,17 @@
+from django.db.backends.postgresql import base
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    health_check_pending = False
+
+    def close_if_unusable_or_obsolete(self):
+        super().close_if_unusable_or_obsolete()
+        self.health_check_pending = self.settings_dict.get(
+            'CONN_HEALTH_CHECKS', False)
+
+    def ensure_connection(self):
+        if self.health_check_pending and self.connection is not None:
+            self.health_check_pending = False
+            if not self.is_usable():
+                self.close()
+        super().ensure_connection()
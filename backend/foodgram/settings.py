@@ -33,6 +33,13 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+METRICS_ENABLED = os.environ.get('METRICS_ENABLED', '') == 'True'
+
+METRICS_FLUSH_INTERVAL = int(os.environ.get('METRICS_FLUSH_INTERVAL', 10))
+
+if METRICS_ENABLED:
+    MIDDLEWARE.insert(0, 'api.metrics.MetricsMiddleware')
+
 ROOT_URLCONF = 'foodgram.urls'
 
 TEMPLATES = [
@@ -61,9 +68,61 @@ DATABASES = {
         'PASSWORD': os.environ.get('POSTGRES_PASSWORD'),
         'HOST': os.environ.get('DB_HOST'),
         'PORT': os.environ.get('DB_PORT'),
+        'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 60)),
+        'CONN_HEALTH_CHECKS': os.environ.get(
+            'DB_CONN_HEALTH_CHECKS', 'True') == 'True',
+        'DISABLE_SERVER_SIDE_CURSORS': os.environ.get(
+            'DB_DISABLE_SERVER_SIDE_CURSORS', '') == 'True',
+    }
+}
+
+LOCMEM_CACHE_BACKEND = 'django.core.cache.backends.locmem.LocMemCache'
+
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get('CACHE_BACKEND', LOCMEM_CACHE_BACKEND),
+        'LOCATION': os.environ.get('CACHE_LOCATION', ''),
     }
 }
 
+CACHE_SHARED = CACHES['default']['BACKEND'] != LOCMEM_CACHE_BACKEND
+
+PDF_RENDER_WORKERS = int(os.environ.get('PDF_RENDER_WORKERS', 0))
+ASGI_MODE = os.environ.get('ASGI_MODE', '') == 'True'
+
+SHOPPING_LIST_CACHE_TIMEOUT = int(
+    os.environ.get('SHOPPING_LIST_CACHE_TIMEOUT', 60 * 60 * 24))
+
+PAGINATION_ESTIMATE_THRESHOLD = int(
+    os.environ.get('PAGINATION_ESTIMATE_THRESHOLD', 100000))
+PAGINATION_COUNT_CACHE_TIMEOUT = int(
+    os.environ.get('PAGINATION_COUNT_CACHE_TIMEOUT', 30))
+
+IMAGE_WORKERS = int(os.environ.get('IMAGE_WORKERS', 2))
+
+IMAGE_MAX_BYTES = int(os.environ.get('IMAGE_MAX_BYTES', 10 * 1024 ** 2))
+
+IMAGE_MAX_SIDE = int(os.environ.get('IMAGE_MAX_SIDE', 8000))
+
+IMAGE_SPOOL_SIZE = int(os.environ.get('IMAGE_SPOOL_SIZE', 1024 ** 2))
+
+RECIPE_MAX_BODY_SIZE = int(os.environ.get(
+    'RECIPE_MAX_BODY_SIZE', IMAGE_MAX_BYTES * 4 // 3 + 1024 ** 2))
+
+RESPONSE_CACHE_TIMEOUT = int(os.environ.get('RESPONSE_CACHE_TIMEOUT', 60))
+
+RECIPE_FRAGMENT_TIMEOUT = int(
+    os.environ.get('RECIPE_FRAGMENT_TIMEOUT', 60 * 60 * 24))
+
+USER_STATE_CACHE_TIMEOUT = int(os.environ.get('USER_STATE_CACHE_TIMEOUT', 300))
+
+REFERENCE_DATA_TIMEOUT = int(os.environ.get('REFERENCE_DATA_TIMEOUT', 300))
+
+INGREDIENT_AUTOCOMPLETE_BACKEND = os.environ.get(
+    'INGREDIENT_AUTOCOMPLETE_BACKEND', 'database')
+INGREDIENT_AUTOCOMPLETE_LIMIT = 10
+INGREDIENT_AUTOCOMPLETE_MAX_LIMIT = 50
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME':
@@ -100,9 +159,11 @@ MEDIA_URL = "/media/"
 MEDIA_ROOT = os.path.join(BASE_DIR, "media")
 
 
+TOKEN_CACHE_TIMEOUT = int(os.environ.get('TOKEN_CACHE_TIMEOUT', 60))
+
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'users.authentication.CachedTokenAuthentication',
     ],
 
     'DEFAULT_FILTER_BACKENDS': [
@@ -0,0 +1,22 @@
+import os
+
+bind = '0:8000'
+workers = int(os.environ.get('GUNICORN_WORKERS', 3))
+threads = int(os.environ.get('GUNICORN_THREADS', 1))
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'sync')
+asgi_mode = 'uvicorn' in worker_class
+wsgi_app = ('foodgram.asgi:application' if asgi_mode
+            else 'foodgram.wsgi:application')
+os.environ['ASGI_MODE'] = str(asgi_mode)
+
+
+def on_starting(server):
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'foodgram.settings')
+    from django.conf import settings
+
+    if server.cfg.workers > 1 and not settings.CACHE_SHARED:
+        server.log.warning(
+            'Кэш в памяти процесса не общий для %s воркеров: кэши списка '
+            'покупок, состояния пользователя, ответов, рецептов и токенов '
+            'отключены. Укажите CACHE_BACKEND с общим кэшем (redis).',
+            server.cfg.workers)
@@ -1,5 +1,11 @@
 from django.contrib import admin
 
-from users.models import Follow
+from users.models import Follow, UserStats
 
 admin.site.register(Follow)
+
+
+@admin.register(UserStats)
+class UserStatsAdmin(admin.ModelAdmin):
+    list_display = ('user', 'recipes_count', 'followers_count')
+    list_select_related = ('user',)
@@ -0,0 +1,80 @@
+import hashlib
+import threading
+from functools import partial
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.functional import SimpleLazyObject
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+from users.models import User
+
+TOKEN_KEY = 'auth_token:{}'
+USER_FLAGS = ('is_active', 'is_staff', 'is_superuser')
+
+
+def get_cache_key(key):
+    return TOKEN_KEY.format(hashlib.sha256(key.encode()).hexdigest())
+
+
+class CachedUser(SimpleLazyObject):
+    def __init__(self, pk, *flags):
+        super().__init__(partial(User.objects.get, pk=pk))
+        self.__dict__.update(dict(zip(USER_FLAGS, flags)), pk=pk, id=pk,
+                             is_authenticated=True, is_anonymous=False)
+
+
+def dump_user(user):
+    return (user.pk, *(getattr(user, flag) for flag in USER_FLAGS))
+
+
+def load_user(state):
+    return CachedUser(*state)
+
+
+class TokenCache:
+    def __init__(self, timeout):
+        self.timeout = timeout
+        self.lock = threading.Lock()
+        self.hits = self.misses = 0
+
+    def get(self, key):
+        if not settings.CACHE_SHARED:
+            return None
+        state = cache.get(get_cache_key(key))
+        with self.lock:
+            if state is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return None if state is None else load_user(state)
+
+    def set(self, key, user):
+        if settings.CACHE_SHARED:
+            cache.set(get_cache_key(key), dump_user(user), self.timeout)
+
+    def invalidate(self, *keys):
+        cache.delete_many([get_cache_key(key) for key in keys])
+
+    def stats(self):
+        with self.lock:
+            requests = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / requests if requests else 0.0,
+            }
+
+
+token_cache = TokenCache(settings.TOKEN_CACHE_TIMEOUT)
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    def authenticate_credentials(self, key):
+        user = token_cache.get(key)
+        if user is None:
+            user, token = super().authenticate_credentials(key)
+            token_cache.set(key, user)
+            return user, token
+        return user, Token(key=key, user_id=user.pk)
@@ -0,0 +1,52 @@
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_for_author(model):
+    return Coalesce(Subquery(
+        model.objects.filter(author=OuterRef('pk')).values(
+            'author').annotate(total=Count('id')).values('total')
+    ), 0)
+
+
+def fill_stats(apps, schema_editor):
+    User = apps.get_model(*settings.AUTH_USER_MODEL.split('.'))
+    UserStats = apps.get_model('users', 'UserStats')
+    users = User.objects.annotate(
+        recipes_total=count_for_author(apps.get_model('api', 'Recipe')),
+        followers_total=count_for_author(apps.get_model('users', 'Follow')),
+    ).values_list('id', 'recipes_total', 'followers_total')
+    UserStats.objects.bulk_create(
+        (UserStats(user_id=pk, recipes_count=recipes,
+                   followers_count=followers)
+         for pk, recipes, followers in users.iterator()),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('api', '0005_recipe_counters'),
+        ('users', '0002_auto_20210930_1515'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserStats',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to=settings.AUTH_USER_MODEL, verbose_name='Пользователь')),
+                ('recipes_count', models.PositiveIntegerField(default=0, verbose_name='Количество рецептов')),
+                ('followers_count', models.PositiveIntegerField(default=0, verbose_name='Количество подписчиков')),
+            ],
+            options={
+                'verbose_name': 'Статистика пользователя',
+                'verbose_name_plural': 'Статистика пользователей',
+            },
+        ),
+        migrations.RunPython(fill_stats, migrations.RunPython.noop),
+    ]
@@ -1,5 +1,6 @@
 from django.contrib.auth import get_user_model
 from django.db import models
+from django.db.models import F
 
 User = get_user_model()
 
@@ -28,3 +29,38 @@ class Follow(models.Model):
                 name='uniqueness in follow',
             )
         ]
+
+
+class UserStatsManager(models.Manager):
+    def increment(self, user_id, field, delta=1):
+        counter = {field: F(field) + delta}
+        if delta < 0:
+            self.filter(user_id=user_id, **{f'{field}__gt': 0}).update(
+                **counter)
+        elif not self.filter(user_id=user_id).update(**counter):
+            self.get_or_create(user_id=user_id)
+            self.filter(user_id=user_id).update(**counter)
+
+
+class UserStats(models.Model):
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats',
+        verbose_name='Пользователь',
+    )
+    recipes_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Количество рецептов',
+    )
+    followers_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Количество подписчиков',
+    )
+
+    objects = UserStatsManager()
+
+    class Meta:
+        verbose_name = 'Статистика пользователя'
+        verbose_name_plural = 'Статистика пользователей'
@@ -6,7 +6,8 @@ from rest_framework.serializers import (
 )
 from rest_framework.validators import UniqueValidator
 
-from users.models import User, Follow
+from api.user_state import get_user_state
+from users.models import User
 
 
 class CustomUserCreateSerializer(UserCreateSerializer):
@@ -38,7 +39,4 @@ class CustomUserSerializer(UserSerializer):
             'is_subscribed')
 
     def get_is_subscribed(self, obj):
-        user = self.context.get('request').user
-        if user.is_anonymous:
-            return False
-        return Follow.objects.filter(user=user, author=obj.id).exists()
+        return obj.id in get_user_state(self.context.get('request')).following
@@ -0,0 +1,30 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from users.authentication import token_cache
+from users.models import Follow, User, UserStats
+
+
+@receiver(post_save, sender=Follow)
+def increment_followers_count(sender, instance, created, **kwargs):
+    if created:
+        UserStats.objects.increment(instance.author_id, 'followers_count')
+
+
+@receiver(post_delete, sender=Follow)
+def decrement_followers_count(sender, instance, **kwargs):
+    UserStats.objects.increment(instance.author_id, 'followers_count', -1)
+
+
+@receiver(post_delete, sender=Token)
+def invalidate_deleted_token(sender, instance, **kwargs):
+    token_cache.invalidate(instance.key)
+
+
+@receiver(post_save, sender=User)
+def invalidate_user_tokens(sender, instance, update_fields=None, **kwargs):
+    if update_fields is None or set(update_fields) != {'last_login'}:
+        keys = Token.objects.filter(user=instance).values_list(
+            'key', flat=True)
+        token_cache.invalidate(*keys)
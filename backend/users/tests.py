@@ -0,0 +1,99 @@
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.test import APIClient
+
+from api.models import Recipe
+from users.authentication import CachedTokenAuthentication, get_cache_key
+from users.models import Follow, User
+
+SUBSCRIPTIONS_URL = '/api/users/subscriptions/'
+
+
+class SubscriptionsTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='reader', email='reader@example.com')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def create_author(self, username, recipes):
+        author = User.objects.create_user(
+            username=username, email=f'{username}@example.com')
+        Recipe.objects.bulk_create(
+            Recipe(author=author, name=f'Рецепт {number}', text='',
+                   image='recipes/test.png', cooking_time=1)
+            for number in range(recipes))
+        return author
+
+    def test_without_follows(self):
+        for url in (SUBSCRIPTIONS_URL,
+                    f'{SUBSCRIPTIONS_URL}?recipes_limit=3'):
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.json()['results'], [])
+
+    def test_empty_page(self):
+        Follow.objects.create(user=self.user,
+                              author=self.create_author('author', 1))
+        response = self.client.get(
+            f'{SUBSCRIPTIONS_URL}?recipes_limit=3&page=2')
+        self.assertEqual(response.status_code, 404)
+
+    def test_recipes_limit(self):
+        for username, recipes in (('first', 5), ('second', 1)):
+            Follow.objects.create(
+                user=self.user, author=self.create_author(username, recipes))
+        with self.assertNumQueries(3):
+            response = self.client.get(
+                f'{SUBSCRIPTIONS_URL}?recipes_limit=3')
+        self.assertEqual(response.status_code, 200)
+        recipes = {item['username']: len(item['recipes'])
+                   for item in response.json()['results']}
+        self.assertEqual(recipes, {'first': 3, 'second': 1})
+
+
+@override_settings(CACHE_SHARED=True)
+class CachedTokenAuthenticationTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='reader', email='reader@example.com')
+        self.token = Token.objects.create(user=self.user)
+        self.key = self.token.key
+        self.authentication = CachedTokenAuthentication()
+
+    def authenticate(self):
+        return self.authentication.authenticate_credentials(self.key)
+
+    def test_cached_user_is_not_shared(self):
+        self.authenticate()
+        with self.assertNumQueries(0):
+            first, _ = self.authenticate()
+            second, _ = self.authenticate()
+            self.assertEqual(first.pk, self.user.pk)
+            self.assertTrue(first.is_authenticated)
+            self.assertFalse(first.is_staff)
+        self.assertEqual(first, self.user)
+        self.assertIsNot(first, second)
+        self.assertIsNot(first._state, second._state)
+        first.first_name = 'Изменено'
+        self.assertEqual(second.first_name, self.user.first_name)
+
+    def test_cache_stores_no_credentials(self):
+        self.authenticate()
+        self.assertEqual(cache.get(get_cache_key(self.key)),
+                         (self.user.pk, True, False, False))
+
+    def test_logout_invalidates_token(self):
+        self.authenticate()
+        self.token.delete()
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate()
+
+    def test_deactivation_invalidates_token(self):
+        self.authenticate()
+        self.user.is_active = False
+        self.user.save()
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate()
@@ -1,3 +1,7 @@
+from collections import defaultdict
+
+from django.db.models import F
+from django.db.models.functions import Coalesce
 from djoser.views import UserViewSet
 from rest_framework import status
 from rest_framework.decorators import action
@@ -5,13 +9,15 @@ from rest_framework.generics import get_object_or_404
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 
+from api.mixins import CursorPaginationMixin
+from api.models import Recipe
 from api.pagination import LimitPageNumberPagination
-from api.serializers import FollowSerializer
+from api.serializers import FollowSerializer, get_recipes_limit
 from users.models import Follow
 from users.models import User
 
 
-class CustomUserViewSet(UserViewSet):
+class CustomUserViewSet(CursorPaginationMixin, UserViewSet):
 
     pagination_class = LimitPageNumberPagination
 
@@ -59,8 +65,17 @@ class CustomUserViewSet(UserViewSet):
     @action(detail=False, permission_classes=[IsAuthenticated])
     def subscriptions(self, request):
         user = request.user
-        queryset = Follow.objects.filter(user=user)
+        queryset = Follow.objects.filter(user=user).select_related(
+            'author').annotate(recipes_count=Coalesce(
+                F('author__stats__recipes_count'), 0))
         pages = self.paginate_queryset(queryset)
+        previews = defaultdict(list)
+        for recipe in Recipe.objects.latest_by_author(
+                [follow.author_id for follow in pages],
+                get_recipes_limit(request)):
+            previews[recipe.author_id].append(recipe)
+        for follow in pages:
+            follow.recipe_previews = previews[follow.author_id]
         serializer = FollowSerializer(
             pages,
             many=True,